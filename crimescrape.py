@@ -1,16 +1,23 @@
 import argparse
+import atexit
 import concurrent.futures
+import ipaddress
 import json
 import logging.handlers
 import os
+import queue
 import re
 import threading
 import time
-from hashlib import md5
+from collections import OrderedDict
+from hashlib import blake2b
 
 from flask import Flask, jsonify
 from markupsafe import escape
+from werkzeug.routing import BaseConverter, ValidationError
 
+from lib.basesearch import json_dumps, json_loads, set_search_cache
+from lib.searchutils import StealthSearch
 from sources.cib import CIBSearch
 from sources.database import DatabaseSearch
 from sources.europol import EuropolSearch
@@ -73,17 +80,46 @@ parser.add_argument(
 args = parser.parse_args()
 
 app = Flask(__name__)
+app.url_map.strict_slashes = False
 CACHE_DIR = "cache"
 CACHE_MAX_DAYS = 5
-EMAIL_REGEX = r"^\S+@\S+\.\S+$"
-PHONE_REGEX = r"^\+?[(]?\d{3})?[-\s\.]?[0-9]{3}[-\s\.]?[0-9]{4,6}$"
-IP_REGEX = r"^((\d|[1-9]\d|1\d{2}|2[0-4]\d|25[0-5])\.){3}(\d|[1-9]\d|1\d{2}|2[0-4]\d|25[0-5])$"
-HOST_REGEX = r"^(([a-zA-Z0-9]|[a-zA-Z0-9][a-zA-Z0-9\-]*[a-zA-Z0-9])\.)*([A-Za-z0-9]|[A-Za-z0-9][A-Za-z0-9\-]*[A-Za-z0-9])$"
+MEM_CACHE: OrderedDict[str, tuple[int, list[dict]]] = OrderedDict()  # filename -> (timestamp, data)
+MEM_CACHE_MAX = 512
+MEM_CACHE_LOCK = threading.Lock()
+CACHE_QUEUE: "queue.Queue[tuple[str, list[dict]]]" = queue.Queue(maxsize=1024)  # Pending cache writes
+EMAIL_REGEX = r"[^\s/]+@[^\s/]+\.[^\s/]+"  # Anchored by the URL router
+HOST_LABEL_REGEX = r"[A-Za-z0-9](?:[A-Za-z0-9\-]{0,61}[A-Za-z0-9])?"
+HOST_REGEX = rf"^{HOST_LABEL_REGEX}(?:\.{HOST_LABEL_REGEX})*$"
+_HOST_RE = re.compile(HOST_REGEX)
+_PHONE_TRANS = str.maketrans("", "", " -().")  # Separators allowed in phone numbers
 HEADLESS = args.headless  # default false
 MAX_THREADS = args.threads  # default 5
 USE_CACHE = not args.nocache
 TIMEOUT = args.timeout
 STANDALONE = False if args.api else True  # Runs standalone by default
+set_search_cache(USE_CACHE)  # --nocache also skips the in-memory results of the modules
+
+# Worker threads are shared by every search instead of being spawned per request.
+# Each search still runs at most MAX_THREADS tasks at once, see dispatch_search.
+EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=MAX_THREADS * 4, thread_name_prefix="crimescrape-search"
+)
+# Every thread that runs a StealthSearch keeps its own Firefox alive, so browser sources get a
+# small pool of their own. This bounds the browsers a long-running server holds to BROWSER_WORKERS.
+BROWSER_WORKERS = MAX_THREADS
+BROWSER_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=BROWSER_WORKERS, thread_name_prefix="crimescrape-browser"
+)
+atexit.register(EXECUTOR.shutdown, wait=False, cancel_futures=True)
+atexit.register(BROWSER_EXECUTOR.shutdown, wait=False, cancel_futures=True)
+
+
+def shutdown_executor() -> None:
+    """Close the browsers launched by the browser workers, then every worker."""
+    StealthSearch.shutdown_workers(BROWSER_EXECUTOR, BROWSER_WORKERS, timeout=TIMEOUT)
+    BROWSER_EXECUTOR.shutdown(wait=False, cancel_futures=True)
+    EXECUTOR.shutdown(wait=False, cancel_futures=True)
+
 
 # Initialize logger early for use in module-level functions
 logger = None
@@ -91,7 +127,7 @@ logger = None
 # Define sources for both standalone and API mode
 def get_name_sources():
     return [
-        InterpolSearch(logging=logger, headless=HEADLESS),
+        InterpolSearch(logging=logger),
         EuropolSearch(logging=logger, headless=HEADLESS),
         NCASearch(logging=logger, headless=HEADLESS),
         FBISearch(logging=logger, headless=HEADLESS),
@@ -108,7 +144,7 @@ def get_name_sources():
     ]
 
 
-CURRENTLY_RUNNING = []  # DO NOT CHANGE
+CURRENTLY_RUNNING: dict[str, "RunningSearches.Flight"] = {}  # DO NOT CHANGE
 
 
 class RunningSearches:
@@ -116,33 +152,52 @@ class RunningSearches:
 
     _lock = threading.Lock()
 
-    @staticmethod
-    def add_running(search_item) -> None:
-        """
-        Adds a new search item to RUNNING_SEARCHES.
-        """
-        global CURRENTLY_RUNNING
-        with RunningSearches._lock:
-            CURRENTLY_RUNNING.append(search_item)
+    class Flight:
+        """A running search that duplicate requests can wait for"""
+
+        def __init__(self) -> None:
+            self.done = threading.Event()
+            self.results: list[dict] = []
 
     @staticmethod
-    def remove_running(search_item) -> None:
+    def acquire(search_item) -> tuple[bool, "RunningSearches.Flight"]:
         """
-        Removes a search item from RUNNING_SEARCHES.
+        Registers search_item in CURRENTLY_RUNNING unless it is already running.
+        Returns (True, flight) if the caller has to perform the search, or
+        (False, flight) with the already running search to wait for.
         """
-        global CURRENTLY_RUNNING
         with RunningSearches._lock:
-            CURRENTLY_RUNNING.remove(search_item)
+            flight = CURRENTLY_RUNNING.get(search_item)
+            if flight is not None:
+                return False, flight
+            flight = CURRENTLY_RUNNING[search_item] = RunningSearches.Flight()
+            return True, flight
 
     @staticmethod
-    def is_running(search_item) -> bool:
+    def release(search_item, results: list[dict]) -> None:
         """
-        Checks if search_item exists in RUNNING_SEARCHES.
-        Returns True if found, False otherwise.
+        Removes search_item from CURRENTLY_RUNNING and wakes up the requests
+        waiting for it, handing them the results.
         """
-        global CURRENTLY_RUNNING
         with RunningSearches._lock:
-            return search_item in CURRENTLY_RUNNING
+            flight = CURRENTLY_RUNNING.pop(search_item)
+        flight.results = results
+        flight.done.set()
+
+
+def is_stale(timestamp: int) -> bool:
+    """Check if a cache entry stored at timestamp is older than CACHE_MAX_DAYS."""
+    days_since = int((time.time() - timestamp) / 86400)  # Seconds
+    return days_since > CACHE_MAX_DAYS
+
+
+def remember_cache(filename: str, timestamp: int, data: list[dict]) -> None:
+    """Keep the decoded cache in memory, evicting the least recently used entries."""
+    with MEM_CACHE_LOCK:
+        MEM_CACHE[filename] = (timestamp, data)
+        MEM_CACHE.move_to_end(filename)
+        while len(MEM_CACHE) > MEM_CACHE_MAX:
+            MEM_CACHE.popitem(last=False)
 
 
 def store_cache(filename: str, data: list[dict]) -> bool:
@@ -154,8 +209,9 @@ def store_cache(filename: str, data: list[dict]) -> bool:
             "timestamp": int(time.time()),
             "data": data,
         }
-        with open(cache_path, "w") as file:
-            file.write(json.dumps(cache_data, ensure_ascii=False))
+        remember_cache(filename, cache_data["timestamp"], data)
+        with open(cache_path, "wb") as file:
+            file.write(json_dumps(cache_data))
 
         logger.info(f"Stored cache {filename}")
         return True
@@ -164,21 +220,53 @@ def store_cache(filename: str, data: list[dict]) -> bool:
     return False
 
 
+def queue_cache(filename: str, data: list[dict]) -> None:
+    """Serve the results from memory right away and leave the disk write to the cache writer thread."""
+    remember_cache(filename, int(time.time()), data)
+    try:
+        CACHE_QUEUE.put_nowait((filename, data))
+    except queue.Full:
+        logger.warning(f"Cache write queue is full, dropping cache {filename}")
+
+
+def cache_writer() -> None:
+    """Store the queued caches on disk, one at a time."""
+    while True:
+        filename, data = CACHE_QUEUE.get()
+        try:
+            store_cache(filename, data)
+        finally:
+            CACHE_QUEUE.task_done()
+
+
+threading.Thread(target=cache_writer, name="crimescrape-cache-writer", daemon=True).start()
+atexit.register(CACHE_QUEUE.join)  # Flush the pending writes before exiting
+
+
 def load_cache(filename: str) -> list[dict] | None:
+    # Serve hot queries from memory without touching the disk
+    with MEM_CACHE_LOCK:
+        entry = MEM_CACHE.get(filename)
+        if entry:
+            if not is_stale(entry[0]):
+                MEM_CACHE.move_to_end(filename)
+                return entry[1]
+            del MEM_CACHE[filename]
+
     cache_path = os.path.join(CACHE_DIR, filename)
     try:
-        with open(cache_path, "r") as file:
-            cache = json.loads(file.read())
+        with open(cache_path, "rb") as file:
+            cache = json_loads(file.read())
             timestamp = cache["timestamp"]  # Load the timestamp
             data = cache["data"]
 
-            # Check if the cache is stale
-            days_since = int((time.time() - timestamp) / 86400)  # Seconds
-            if days_since > CACHE_MAX_DAYS:
-                os.remove(cache_path)  # Delete the cachefile
-                return None
-            else:
-                return data
+        # Check if the cache is stale
+        if is_stale(timestamp):
+            os.remove(cache_path)  # Delete the cachefile
+            return None
+
+        remember_cache(filename, timestamp, data)
+        return data
 
     except Exception as e:
         logger.error(f"Error loading cache {filename}: {e}")
@@ -194,8 +282,24 @@ def gen_cache_filename(content: str) -> str:
     Returns:
         str: The resulting filename for cache I/O operations.
     """
-    res = md5(content.upper().encode()).hexdigest()
-    return res
+    # bytes.upper() only folds ASCII, so non-ASCII queries still go through str.upper()
+    data = content.encode().upper() if content.isascii() else content.upper().encode()
+    return blake2b(data, digest_size=16).hexdigest()
+
+
+def is_ip(host: str) -> bool:
+    """Check if host is a valid IPv4 or IPv6 address."""
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+def is_phone(phone: str) -> bool:
+    """Check if phone is a 7 to 15 digit number, optionally with a leading + and separators."""
+    digits = phone.removeprefix("+").translate(_PHONE_TRANS)
+    return digits.isdigit() and digits.isascii() and 7 <= len(digits) <= 15
 
 
 def gen_results(status: str, data: list[dict]) -> dict:
@@ -211,38 +315,71 @@ def gen_error(info: str):
     return {"status": "error", "info": info}
 
 
+def executor_for(source) -> concurrent.futures.ThreadPoolExecutor:
+    """Pick the pool a source runs on. Browser sources stay on the few threads that own a browser."""
+    return BROWSER_EXECUTOR if isinstance(source, StealthSearch) else EXECUTOR
+
+
+def run_task(slots: threading.Semaphore, method, *args):
+    """
+    Run a search task on a worker thread.
+    The browser a BROWSER_EXECUTOR thread launched is kept alive, so its next task only opens a new context.
+    """
+    with slots:
+        return method(*args)
+
+
+def dispatch_search(sources, search_methods, max_threads, timeout) -> list[tuple]:
+    """Run every search method against every source across multiple threads.
+
+    Args:
+        sources (list): List of source objects to perform searches.
+        search_methods (list): List of search methods (functions).
+        max_threads (int): Maximum number of concurrent searches.
+        timeout (int): Seconds to wait for the searches to finish.
+
+    Returns:
+        list[tuple]: A (source, result) pair for every search that returned results.
+    """
+    found = []
+    slots = threading.Semaphore(max_threads)  # Keep one search from taking over the shared pool
+    future_tasks = {
+        executor_for(src).submit(run_task, slots, method, src): (src, method)
+        for src in sources
+        for method in search_methods
+    }
+
+    done, not_done = concurrent.futures.wait(
+        future_tasks.keys(),
+        timeout=timeout,
+        return_when=concurrent.futures.ALL_COMPLETED,
+    )
+
+    # Process completed searches
+    for future in done:
+        source, method = future_tasks[future]
+        try:
+            result = future.result()
+            if result:
+                logger.debug(f"Results found for {source}: {result}")
+                found.append((source, result))
+        except Exception as e:
+            logger.error(f"Error searching {source} with {method}: {e}")
+
+    # Handle timeouts. Searches that already started can not be cancelled through their
+    # future, so they are told to stop before their next request and free the worker.
+    for future in not_done:
+        source, method = future_tasks[future]
+        logger.warning(f"Search for {source} using {method} timed out.")
+        if not future.cancel():
+            source.cancel()
+    return found
+
 
 def execute_search(sources, search_methods, results, max_threads, timeout):
     """Execute searches across multiple threads"""
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_threads) as executor:
-        future_tasks = {
-            executor.submit(method, src): (src, method)
-            for src in sources
-            for method in search_methods
-        }
-
-        done, not_done = concurrent.futures.wait(
-            future_tasks.keys(),
-            timeout=timeout,
-            return_when=concurrent.futures.ALL_COMPLETED,
-        )
-
-        # Process completed searches
-        for future in done:
-            source, method = future_tasks[future]
-            try:
-                result = future.result()
-                if result:
-                    logger.debug(f"Results found for {source}: {result}")
-                    results.append(result)
-            except Exception as e:
-                logger.error(f"Error searching {source} with {method}: {e}")
-
-        # Handle timeouts
-        for future in not_done:
-            source, method = future_tasks[future]
-            logger.warning(f"Search for {source} using {method} timed out.")
-            future.cancel()
+    for _, result in dispatch_search(sources, search_methods, max_threads, timeout):
+        results.append(result)
 
 
 def perform_search(
@@ -267,39 +404,73 @@ def perform_search(
 
     logger.info(log_message)
 
-    # Check if search is already running
-    while RunningSearches.is_running(query_id):
-        time.sleep(0.1)
-    RunningSearches.add_running(query_id)
-
-    # Try to load cache
-    if USE_CACHE:
-        cache = load_cache(query_id)
-        if cache:
-            RunningSearches.remove_running(query_id)
-            logger.info(f"Cache found: {query_id}")
-            return jsonify(gen_results("cached", cache))
+    # If the same search is already running, wait for it and share its results
+    is_leader, flight = RunningSearches.acquire(query_id)
+    if not is_leader:
+        flight.done.wait()
+        logger.info(f"Served results of running search: {query_id}")
+        return jsonify(gen_results("cached", flight.results))
 
-    # Execute search
-    execute_search(sources, search_methods, results, MAX_THREADS, TIMEOUT)
-
-    # Cache and return results
-    if USE_CACHE:
-        store_cache(query_id, results)
-
-    RunningSearches.remove_running(query_id)
+    try:
+        # Try to load cache
+        if USE_CACHE:
+            cache = load_cache(query_id)
+            if cache:
+                results = cache
+                logger.info(f"Cache found: {query_id}")
+                return jsonify(gen_results("cached", cache))
+
+        # Execute search
+        execute_search(sources, search_methods, results, MAX_THREADS, TIMEOUT)
+
+        # Cache and return results
+        if USE_CACHE:
+            queue_cache(query_id, results)
+    finally:
+        RunningSearches.release(query_id, results)
 
     if STANDALONE:
         return gen_results("fresh", results)
     return jsonify(gen_results("fresh", results))
 
 
-@app.route("/api/searchHost/<host>")
-def search_by_host(host: str):
-    # Validate input
-    if not (re.match(IP_REGEX, host) or re.match(HOST_REGEX, host)):
-        return gen_error("Invalid hostname")
+class EmailConverter(BaseConverter):
+    """Only routes URL segments that look like an email address."""
+
+    regex = EMAIL_REGEX
+    part_isolating = True  # The regex excludes "/", werkzeug only guesses from it containing one
+
+
+class HostConverter(BaseConverter):
+    """Only routes URL segments holding an IP address or a hostname."""
+
+    regex = r"[0-9A-Za-z.:\-]+"
+
+    def to_python(self, value: str) -> str:
+        if not (is_ip(value) or _HOST_RE.match(value)):
+            raise ValidationError
+        return value
+
 
+class PhoneConverter(BaseConverter):
+    """Only routes URL segments holding a phone number."""
+
+    regex = r"\+?[0-9 ().\-]+"
+
+    def to_python(self, value: str) -> str:
+        if not is_phone(value):
+            raise ValidationError
+        return value
+
+
+# Malformed input is rejected by the router with a 404, before any handler runs
+app.url_map.converters["email"] = EmailConverter
+app.url_map.converters["ip_or_host"] = HostConverter
+app.url_map.converters["phone"] = PhoneConverter
+
+
+@app.route("/api/searchHost/<ip_or_host:host>")
+def search_by_host(host: str):
     sources = []
     search_methods = []
     return perform_search(
@@ -311,11 +482,8 @@ def search_by_host(host: str):
     )
 
 
-@app.route("/api/searchPhone/<phone>")
+@app.route("/api/searchPhone/<phone:phone>")
 def search_by_phone(phone: str):
-    if not re.match(PHONE_REGEX, phone):
-        return gen_error("Invalid phone number")
-
     sources = []
     search_methods = []
     return perform_search(
@@ -327,11 +495,8 @@ def search_by_phone(phone: str):
     )
 
 
-@app.route("/api/searchEmail/<email>")
+@app.route("/api/searchEmail/<email:email>")
 def search_by_email(email: str):
-    if not re.match(EMAIL_REGEX, email):
-        return gen_error("Invalid email address")
-
     sources = []
     search_methods = []
     return perform_search(
@@ -394,30 +559,17 @@ def run_standalone(queryfile: str, resultfile: str) -> str | None:
         os.remove(resultfile)
 
     search_engines = get_name_sources()
-    with open(queryfile, "r", encoding="UTF-8") as f:
-        search_query = json.load(f)
-
-    results = {}
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-        future_to_engine = {
-            executor.submit(
-                engine.search,
-                search_query["fname"],
-                search_query["lname"],  # need add for every function timeout argument
-            ): engine.__class__.__name__
-            for engine in search_engines
-        }
-        for future in concurrent.futures.as_completed(future_to_engine):
-            engine_name = future_to_engine[future]
-            try:
-                logger.info(f"Success: executed module -> {engine_name}")
-                result = future.result()
-                if result:  # Only store non-empty results
-                    results[engine_name] = result
-            except Exception as err:
-                logger.warning(f"Failed: execute module -> {engine_name} as error {err}")
-                continue
+    with open(queryfile, "rb") as f:
+        search_query = json_loads(f.read())
+
+    search_methods = [
+        lambda src: src.search(search_query["fname"], search_query["lname"]),
+    ]
+
+    results = {
+        engine.__class__.__name__: result
+        for engine, result in dispatch_search(search_engines, search_methods, MAX_THREADS, TIMEOUT)
+    }
 
     if results:
         with open(resultfile, "w") as f:
@@ -437,13 +589,16 @@ if __name__ == "__main__":
     logger = logging.getLogger(__name__)
     logging.basicConfig(filename=args.logs, encoding="utf-8", level=logging.INFO)
 
-    # Decide and start appropriate mode
-    if STANDALONE:
-        # Make sure the arguments were correctly passed
-        if not (args.query or args.results):
-            print("Error: --query/--results file required for standalone mode.")
-            exit(1)
+    # Make sure the arguments were correctly passed
+    if STANDALONE and not (args.query or args.results):
+        print("Error: --query/--results file required for standalone mode.")
+        exit(1)
 
-        run_standalone(args.query, args.results)
-    else:
-        app.run(host=args.host, port=args.port)
+    # Decide and start appropriate mode
+    try:
+        if STANDALONE:
+            run_standalone(args.query, args.results)
+        else:
+            app.run(host=args.host, port=args.port, debug=False, use_reloader=False)
+    finally:
+        shutdown_executor()  # The atexit hook runs too late to hand work to the executor
@@ -1,9 +1,24 @@
+import functools
 import json
+import re
+import threading
+import time
 import warnings
+from collections import OrderedDict
+from html import unescape
 from logging import Logger
+from typing import Literal
 
+import msgspec
+import soupsieve as sv
 from bs4 import BeautifulSoup as bs
-from rapidfuzz import fuzz
+from bs4 import SoupStrainer
+from rapidfuzz import fuzz, process
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the stdlib json
+    orjson = None
 
 # TODO: Review code and delegate exceptions to callers where applicable.
 
@@ -21,12 +36,121 @@ To achieve this, we need to:
 """
 
 
+# Cheap literal markers, every alternative of _CAPTCHA_RE contains at least one of them.
+# Only the responses containing one of them are confirmed against the full pattern.
+# Both match case-insensitively on the original content, so the body is never copied to lower it.
+_CAPTCHA_MARKERS = re.compile(r"captcha|challenge|robot", re.I)
+_CAPTCHA_RE = re.compile(r"recaptcha|hcaptcha|cloudflare.*challenge|you.*robot|challenge.*page", re.I)
+# Browsers wrap JSON documents in a bare <pre>, which does not need a full HTML parse
+_PRE_RE = re.compile(r"<pre(?:\s[^>]*)?>(.*?)</pre>", re.S | re.I)
+
+# Results of the module searches, shared by every instance: (class, fname, lname) -> (expiry, result)
+SEARCH_CACHE: OrderedDict[tuple[str, str, str], tuple[float, dict | None]] = OrderedDict()
+SEARCH_CACHE_MAX = 4096
+SEARCH_CACHE_TTL = 3600  # Seconds to keep found results
+SEARCH_CACHE_MISS_TTL = 300  # Seconds to keep "not found" results
+SEARCH_CACHE_LOCK = threading.Lock()
+_search_cache_enabled = True
+
+
+def set_search_cache(enabled: bool) -> None:
+    """Turn the in-memory search cache on or off, e.g. when caching is disabled with --nocache."""
+    global _search_cache_enabled
+    _search_cache_enabled = enabled
+
+
+def clear_search_cache() -> None:
+    """Forget every cached search result."""
+    with SEARCH_CACHE_LOCK:
+        SEARCH_CACHE.clear()
+
+
+def cached_search(search):
+    """
+    Decorator for the search(fname, lname) method of the modules.
+    Remembers the results per module and case-insensitive name for a while, so repeated
+    queries don't hit the sites again. Exceptions are never cached, and neither are results
+    of searches where a fetch failed, since a missing result may just be a blocked request.
+    """
+
+    @functools.wraps(search)
+    def wrapper(self, fname: str, lname: str) -> dict | None:
+        if not _search_cache_enabled:
+            return search(self, fname, lname)
+
+        key = (type(self).__qualname__, fname.casefold(), lname.casefold())
+        with SEARCH_CACHE_LOCK:
+            entry = SEARCH_CACHE.get(key)
+            if entry and entry[0] > time.monotonic():
+                SEARCH_CACHE.move_to_end(key)
+                return entry[1]
+
+        self.fetch_failed = False
+        result = search(self, fname, lname)
+        if self.fetch_failed:
+            return result
+
+        ttl = SEARCH_CACHE_TTL if result else SEARCH_CACHE_MISS_TTL
+        with SEARCH_CACHE_LOCK:
+            SEARCH_CACHE[key] = (time.monotonic() + ttl, result)
+            SEARCH_CACHE.move_to_end(key)
+            while len(SEARCH_CACHE) > SEARCH_CACHE_MAX:
+                SEARCH_CACHE.popitem(last=False)
+        return result
+
+    return wrapper
+
+
+def json_loads(data: str | bytes):
+    """Decode a JSON document, using orjson when it is available."""
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+def json_dumps(data) -> bytes:
+    """Encode data as UTF-8 JSON bytes, using orjson when it is available."""
+    if orjson:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+def has_class(*classes: str):
+    """
+    Build a SoupStrainer attribute filter matching elements with any of the given CSS classes.
+    While parsing, SoupStrainer sees the raw class attribute, so a plain string only matches it as a whole.
+    """
+    wanted = set(classes)
+
+    def match(value) -> bool:
+        if value is None:
+            return False
+        return not wanted.isdisjoint(value.split() if isinstance(value, str) else value)
+
+    return match
+
+
+def _lower_all(names: list[str]) -> list[str]:
+    """Normalise every candidate name in one pass, so the scorer doesn't call back into Python per name."""
+    return [name.lower() for name in names]
+
+
 class BaseSearch:
     RISK_LEVELS = ["Low", "Medium", "High", "Dangerous"]
 
     def __init__(self, logger: Logger | None = None) -> None:
         self.fuzzy_match_threshold = 85
         self.logger = logger
+        self.cancelled = threading.Event()
+        self.fetch_failed = False  # Set by the fetch helpers when a request errors out
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False  # Don't suppress exceptions
+
+    def close(self) -> None:
+        """Release the resources held by the search. Plain searches hold none."""
 
     class InvalidResponseError(Exception):
         """Thrown when the returned value is not a valid response"""
@@ -36,6 +160,39 @@ class BaseSearch:
         """Thrown when the module has detected a CAPTCHA blocking the codeflow"""
         pass
 
+    class CancelledError(Exception):
+        """Thrown when the search has been cancelled, usually because it ran out of time"""
+        pass
+
+    def cancel(self) -> None:
+        """Ask a running search to stop. It is interrupted before its next request."""
+        self.cancelled.set()
+
+    def _check_cancelled(self) -> None:
+        """Raise CancelledError if the search has been cancelled."""
+        if self.cancelled.is_set():
+            raise self.CancelledError
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _fullname(fname: str, lname: str) -> str:
+        """Build the upper-cased full name matched by the sources. Every source searches the same name, so it's cached."""
+        return f"{fname} {lname}".upper()
+
+    @staticmethod
+    def _check_for_captcha(content: str) -> bool:
+        """Detect common CAPTCHA patterns in the response.
+
+        Args:
+            content (str): The response content to check for CAPTCHA indicators.
+
+        Returns:
+            bool: True if CAPTCHA is detected, False otherwise.
+        """
+        if _CAPTCHA_MARKERS.search(content) is None:
+            return False
+        return _CAPTCHA_RE.search(content) is not None
+
     @staticmethod
     def gen_response(risk: str, source: str, notice_id: str, charges: list[str] | str = "Unknown") -> dict:
         """Generate the results for a submodule the correct way.
@@ -55,7 +212,7 @@ class BaseSearch:
         if isinstance(charges, str):
             charges = [charges]
 
-        if risk not in BaseSearch.RISK_LEVELS:
+        if risk not in _RISK_RANK:
             raise ValueError(
                 f"The supplied risk is invalid: {risk}.\nPlease use one of these: {', '.join(BaseSearch.RISK_LEVELS)}."
             )
@@ -76,38 +233,10 @@ class BaseSearch:
             stacklevel=2
         )
 
-        # Check if top-level keys 'risk' and 'notices' exist
-        if not isinstance(data, dict):
-            raise self.InvalidResponseError
-
-        if "risk" not in data or "notices" not in data:
-            raise self.InvalidResponseError
-
-        # Check if 'risk' is a string and has a valid value
-        if not isinstance(data["risk"], str) or data["risk"] not in self.RISK_LEVELS:
-            raise self.InvalidResponseError
-
-        # Check if 'notices' is a dictionary
-        if not isinstance(data["notices"], dict):
-            raise self.InvalidResponseError
-
-        # Validate the structure inside 'notices'
-        for source, details in data["notices"].items():
-            if not isinstance(details, dict):
-                raise self.InvalidResponseError
-
-            # Check if 'id' is a string
-            if "id" not in details or not isinstance(details["id"], str):
-                raise self.InvalidResponseError
-
-            # Check if 'charges' is a list of strings
-            if "charges" not in details or not isinstance(details["charges"], list):
-                raise self.InvalidResponseError
-
-            for charge in details["charges"]:
-                if not isinstance(charge, str):
-                    raise self.InvalidResponseError
-
+        try:
+            msgspec.convert(data, ResponseSchema)
+        except msgspec.ValidationError as e:
+            raise self.InvalidResponseError from e
         return data
 
     @staticmethod
@@ -115,24 +244,69 @@ class BaseSearch:
             local_name: str, remote_name: str, threshold: int = 85
     ) -> bool:
         """Check if the fuzzy match between two names meets the threshold."""
-        score = fuzz.ratio(local_name.lower(), remote_name.lower())
+        score = fuzz.ratio(local_name, remote_name, processor=str.lower, score_cutoff=threshold)
         return score >= threshold
 
     @staticmethod
-    def parse_html(html: str) -> bs:
-        """Parse the HTML content and return a BeautifulSoup object."""
-        return bs(html, "html.parser")
+    def find_name_match(
+            local_name: str, remote_names: list[str], threshold: int = 85, hint: str = ""
+    ) -> int | None:
+        """
+        Return the index of the first remote name whose fuzzy match meets the threshold, or None.
+        An exact (case-insensitive) match is looked up first and wins without any fuzzy scoring.
+        If a hint (usually the last name) is given, the names containing its first characters are scored first,
+        and the rest are only scored when none of those match.
+        """
+        query = local_name.lower()
+        names = _lower_all(remote_names)
+        try:
+            return names.index(query)
+        except ValueError:
+            pass  # No exact match, score them
+
+        if hint:
+            key = hint.lower()[:4]
+            likely = {index: name for index, name in enumerate(names) if key in name}
+            rest = {index: name for index, name in enumerate(names) if index not in likely}
+            groups = (likely, rest)
+        else:
+            groups = (names,)
+
+        for group in groups:
+            matches = process.extract_iter(query, group, scorer=fuzz.ratio, processor=None, score_cutoff=threshold)
+            index = next((index for _, _, index in matches), None)
+            if index is not None:
+                return index
+        return None
+
+    @staticmethod
+    def parse_html(html: str, strainer: SoupStrainer | None = None) -> bs:
+        """
+        Parse the HTML content with the lxml backend and return a BeautifulSoup object.
+        If a strainer is supplied, only the matching elements (and their children) are kept in the tree.
+        """
+        return bs(html, "lxml", parse_only=strainer)
 
     def parse_json(self, html: str) -> dict:
-        """Parse JSON from HTML content."""
+        """Parse JSON from a plain JSON document or from the <pre> element of HTML content."""
         try:
-            soup = self.parse_html(html)
-            pre_element = soup.find("pre")
-            if pre_element is None:
+            text = html.lstrip()
+            if text[:1] in ("{", "["):
+                try:
+                    return json_loads(text)
+                except json.JSONDecodeError:
+                    pass  # Not a bare JSON document, look for a <pre> wrapper
+
+            match = _PRE_RE.search(html)
+            if match is None:
                 raise ValueError("No <pre> element found in HTML")
-            res = pre_element.get_text()
-            return json.loads(res)
-        except json.JSONDecodeError as e:
+            res = match.group(1)
+            if "<" in res:  # Markup inside the <pre>, let the parser extract the text
+                res = self.parse_html(res).get_text()
+            elif "&" in res:
+                res = unescape(res)
+            return json_loads(res)
+        except json.JSONDecodeError as e:  # orjson.JSONDecodeError is a subclass
             if self.logger:
                 self.logger.error(f"Failed to parse JSON: {e}")
             return {}
@@ -150,7 +324,33 @@ class BaseSearch:
         return element.get_text(strip=True) if element else default
 
     @staticmethod
-    def merge_responses(responses: list[dict]) -> dict:  # NOSONAR (S3776) "Deprecated function"
+    def extract_fields(
+            soup: bs, spec: dict[str, str], defaults: dict[str, str] | None = None
+    ) -> dict[str, str]:
+        """
+        Extract the text of several elements in a single pass over the tree.
+
+        Args:
+            soup (bs): The BeautifulSoup object to search in.
+            spec (dict[str, str]): Maps every field name to the CSS selector of its element.
+            defaults (dict[str, str] | None): Values for the fields whose element is not found. Empty string otherwise.
+
+        Returns:
+            dict[str, str]: The stripped text of the first element matching each field.
+        """
+        fields = {field: (defaults or {}).get(field, "") for field in spec}
+        pending = {field: sv.compile(selector) for field, selector in spec.items()}
+        for element in sv.iselect(", ".join(spec.values()), soup):
+            for field, selector in list(pending.items()):
+                if selector.match(element):
+                    fields[field] = element.get_text(strip=True)
+                    del pending[field]
+            if not pending:
+                break
+        return fields
+
+    @staticmethod
+    def merge_responses(responses: list[dict]) -> dict:
         """
         Merges a list of dictionaries into one unique dictionary,
         ensuring the highest risk level is retained.
@@ -161,43 +361,49 @@ class BaseSearch:
         Returns:
             dict: A merged dictionary.
         """
-
-        def _preserve_order_dedup(items: list) -> list:
-            """Remove duplicates while preserving insertion order."""
-            seen = set()
-            result = []
-            for item in items:
-                if item not in seen:
-                    seen.add(item)
-                    result.append(item)
-            return result
-
-        def merge_recursive(d1, d2):
-            """Recursively merges two dictionaries."""
-            for key, value in d2.items():
-                if key in d1:
-                    if isinstance(d1[key], dict) and isinstance(value, dict):
+        merged = {}
+        seen = {}  # id() of every merged list -> items it already holds
+        for response in responses:
+            pending = [(merged, response)]  # Walk nested dictionaries without recursion
+            while pending:
+                target, source = pending.pop()
+                for key, value in source.items():
+                    current = target.get(key)
+                    if isinstance(value, dict) and (current is None or isinstance(current, dict)):
                         # Merge nested dictionaries
-                        merge_recursive(d1[key], value)
-                    elif isinstance(d1[key], list) and isinstance(value, list):
+                        if current is None:
+                            current = target[key] = {}
+                        pending.append((current, value))
+                    elif isinstance(value, list) and (current is None or isinstance(current, list)):
                         # Combine lists, ensuring no duplicates while preserving order
-                        d1[key] = _preserve_order_dedup(d1[key] + value)
-                    elif key == "risk":
+                        if current is None:
+                            current = target[key] = []
+                        known = seen.setdefault(id(current), set())
+                        for item in value:
+                            if item not in known:
+                                known.add(item)
+                                current.append(item)
+                    elif key == "risk" and key in target:
                         # Update risk based on priority
-                        d1[key] = max(
-                            d1[key], value, key=lambda r: BaseSearch.RISK_LEVELS.index(r)
-                        )
+                        if _RISK_RANK[value] > _RISK_RANK[current]:
+                            target[key] = value
                     else:
-                        # Overwrite value if types are different
-                        d1[key] = value
-                else:
-                    # Add new key-value pair
-                    d1[key] = value
-            return d1
-
-        # Start with an empty dictionary
-        merged_dict = {}
-        for d in responses:
-            merged_dict = merge_recursive(merged_dict, d)
-
-        return merged_dict
+                        # Add new values and overwrite the ones with different types
+                        target[key] = value
+
+        return merged
+
+
+_RISK_RANK = {risk: rank for rank, risk in enumerate(BaseSearch.RISK_LEVELS)}
+
+
+class NoticeSchema(msgspec.Struct):
+    """Schema of a single notice, checked by validate_response"""
+    id: str
+    charges: list[str]
+
+
+class ResponseSchema(msgspec.Struct):
+    """Schema of a module response, checked by validate_response"""
+    risk: Literal[tuple(BaseSearch.RISK_LEVELS)]
+    notices: dict[str, NoticeSchema]
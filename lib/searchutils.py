@@ -1,10 +1,20 @@
-import re
+import concurrent.futures
+import os
+import threading
+import time
+from collections.abc import Callable
+from hashlib import blake2b
 from logging import Logger
+from urllib.parse import urlsplit
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from playwright.sync_api import Browser, BrowserContext, Page, Route
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 from playwright.sync_api import sync_playwright as pw
 
-from lib.basesearch import BaseSearch
+from lib.basesearch import BaseSearch, json_dumps, json_loads
 
 """
 This file contains the necessary utils to do the scraping using different methods.
@@ -15,79 +25,222 @@ There are two main classes here:
 
 In case a complex website is to be scraped with a webdriver, StealthSearch manages all the necessary
 resources and avoid leaks by using context managers. The manual use of the drivers through basesearch.py is discouraged.
+Browsers are pooled per worker thread and reused across requests. The owner of the worker threads closes them
+with StealthSearch.shutdown_workers() before shutting its executor down.
 """
 
+# Keep-alive sockets are shared by every RequestSearch across all the worker threads, so
+# repeated requests to the same host skip the TCP and TLS handshakes.
+POOL_SIZE = 10
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(
+    pool_connections=POOL_SIZE,
+    pool_maxsize=POOL_SIZE * 2,
+    max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504]),
+)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
+
+# Bodies are streamed and cut at MAX_BODY_SIZE bytes, so a huge page can not blow up the memory of a worker
+MAX_BODY_SIZE = 8 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+REQUEST_TIMEOUT = (5, 30)  # Seconds to connect, seconds between received bytes
+
+LISTING_CACHE_DIR = os.path.join("cache", "listings")
+
+# Resources no source reads. Stylesheets still load: visibility waits and scroll-triggered loading depend on them.
+BLOCKED_RESOURCES = frozenset({"image", "font", "media"})
+
+# Opt-in on-disk cache of RequestSearch responses, meant for development and test runs that repeat the same queries.
+# Enable it with CRIMESCRAPE_CACHE=1. Entries hold the encoding on the first line and the raw body after it.
+HTTP_CACHE_ENABLED = os.environ.get("CRIMESCRAPE_CACHE") == "1"
+HTTP_CACHE_DIR = os.path.join("cache", "http")
+HTTP_CACHE_TTL = 86400
+
+
+class RateLimiter:
+    """Spaces out the requests made to the same domain, across every thread using the limiter."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next: dict[str, float] = {}  # domain -> earliest time for its next request
+
+    def wait(self, url: str) -> None:
+        """Block until a request to the domain of url is allowed."""
+        domain = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(domain, now))
+            self._next[domain] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class ListingCache:
+    """
+    Keeps a scraped list for ttl seconds, shared by every search in the process.
+    The list is also stored on disk as JSON, so a freshly started worker reuses it instead of scraping it again.
+    """
+
+    def __init__(self, name: str, ttl: int = 3600) -> None:
+        self.path = os.path.join(LISTING_CACHE_DIR, f"{name}.json")
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._expiry = 0.0  # Wall clock time, so it stays valid across processes
+        self._value: list = []
+
+    def get(self, loader: Callable[[], list]) -> list:
+        """Return the cached list, calling loader to scrape it again once it has expired."""
+        with self._lock:
+            if self._expiry > time.time() or self._load():
+                return self._value
+
+        value = loader()
+        if value:  # Don't hold on to an empty list, it's most likely a failed fetch
+            self._store(value)
+        return value
+
+    def _load(self) -> bool:
+        """Load a fresh list stored by this or another process. Call with _lock held."""
+        try:
+            with open(self.path, "rb") as file:
+                cache = json_loads(file.read())
+            expiry = cache["timestamp"] + self.ttl
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        if expiry <= time.time():
+            return False
+        self._expiry, self._value = expiry, cache["data"]
+        return True
+
+    def _store(self, value: list) -> None:
+        timestamp = time.time()
+        with self._lock:
+            self._expiry, self._value = timestamp + self.ttl, value
+        try:
+            os.makedirs(LISTING_CACHE_DIR, exist_ok=True)
+            temp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as file:
+                file.write(json_dumps({"timestamp": timestamp, "data": value}))
+            os.replace(temp_path, self.path)  # Never leave a half written list for other processes
+        except OSError:
+            pass  # The in-memory copy still works
+
 
 class StealthSearch(BaseSearch):
+    # Playwright objects can only be used from the thread that created them, so every
+    # worker thread keeps its own Playwright instance and one browser per headless mode.
+    # Requests only create a fresh context and page on top of the already running browser.
+    _local = threading.local()
+
     def __init__(self, logger: Logger | None = None, headless: bool = True) -> None:
         """Initializes the Webdriver-based search object."""
         super().__init__(logger)
         self.headless = headless
         self.driver = None
-        self.browser = None
-        self.playwright = None
-
-    def __enter__(self):
-        """Context manager entry point for resource management."""
-        self._start_driver()
-        return self
+        self.context = None
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        """Context manager exit point for resource cleanup."""
+    def close(self) -> None:
+        """Closes the context and page of the object. The pooled browser is kept for reuse."""
         self._close_driver()
-        return False  # Don't suppress exceptions
 
-    def _start_driver(self) -> None:  # type: ignore
-        try:
-            playwright = pw().start()
-            browser = playwright.firefox.launch(headless=self.headless)
-            context = browser.new_context()
-            page = context.new_page()
-            self.driver, self.browser, self.playwright = page, browser, playwright
-        except Exception as e:
-            # Ensure cleanup in case of failure
-            self._close_driver()
-            raise e
+    @classmethod
+    def _get_browser(cls, headless: bool) -> Browser:
+        """Return the browser owned by the calling thread, launching it if needed."""
+        local = cls._local
+        if getattr(local, "playwright", None) is None:
+            local.playwright = pw().start()
+            local.browsers = {}
 
-    def _close_driver(self) -> None:  # type: ignore
+        browser = local.browsers.get(headless)
+        if browser is None or not browser.is_connected():
+            browser = local.playwright.firefox.launch(headless=headless)
+            local.browsers[headless] = browser
+        return browser
+
+    @classmethod
+    def shutdown(cls) -> None:
         """
-        Closes the browser and Playwright instance if they are open.
+        Closes the browsers and the Playwright instance owned by the calling thread.
+        Must be called from the same thread that used them.
         """
-        if self.browser:
+        local = cls._local
+        for browser in getattr(local, "browsers", {}).values():
             try:
-                self.browser.close()
-            except Exception as e:
-                if self.logger:
-                    self.logger.error(f"Error closing browser: {e}")
-        if self.playwright:
+                browser.close()
+            except Exception:
+                pass  # The browser is already gone
+        if getattr(local, "playwright", None) is not None:
             try:
-                self.playwright.stop()
-            except Exception as e:
-                if self.logger:
-                    self.logger.error(f"Error stopping Playwright: {e}")
-        self.driver = None
-        self.browser = None
-        self.playwright = None
+                local.playwright.stop()
+            except Exception:
+                pass
+        local.playwright = None
+        local.browsers = {}
+
+    @classmethod
+    def shutdown_workers(
+            cls, executor: concurrent.futures.ThreadPoolExecutor, workers: int, timeout: float = 10
+    ) -> None:
+        """
+        Closes the browsers owned by every thread of an executor.
+        Each worker must run shutdown() itself, so one task per worker is submitted and every task waits
+        for the others before returning. No worker can pick up a second task, so each one runs exactly one.
+        """
+        barrier = threading.Barrier(workers, timeout=timeout)
+
+        def _shutdown_worker() -> None:
+            cls.shutdown()
+            try:
+                barrier.wait()
+            except threading.BrokenBarrierError:
+                pass  # A worker is stuck in a search, the rest are done anyway
+
+        try:
+            futures = [executor.submit(_shutdown_worker) for _ in range(workers)]
+        except RuntimeError:
+            return  # The executor is already shut down along with its threads
+        concurrent.futures.wait(futures, timeout=timeout)
 
     @staticmethod
-    def _check_for_captcha(content: str) -> bool:
-        """Detect common CAPTCHA patterns in the response.
+    def _block_resources(route: Route) -> None:
+        if route.request.resource_type in BLOCKED_RESOURCES:
+            route.abort()
+        else:
+            route.continue_()
 
-        Args:
-            content (str): The response content to check for CAPTCHA indicators.
+    def _acquire(self) -> tuple[BrowserContext, Page]:
+        """Create a new context and page on top of the pooled browser."""
+        self._check_cancelled()
+        context = self._get_browser(self.headless).new_context()
+        try:
+            context.route("**/*", self._block_resources)
+            return context, context.new_page()
+        except Exception:
+            self._release(context)
+            raise
 
-        Returns:
-            bool: True if CAPTCHA is detected, False otherwise.
+    def _release(self, context: BrowserContext | None) -> None:
+        """Close a context created by _acquire. The browser is kept alive for reuse."""
+        if context:
+            try:
+                context.close()
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(f"Error closing browser context: {e}")
+
+    def _start_driver(self) -> None:  # type: ignore
+        self._close_driver()  # Never leak a previous context
+        self.context, self.driver = self._acquire()
+
+    def _close_driver(self) -> None:  # type: ignore
         """
-        captcha_patterns = [
-            r'recaptcha',
-            r'hcaptcha',
-            r'cloudflare.*challenge',
-            r'you.*robot',
-            r'challenge.*page',
-        ]
-        content_lower = content.lower()
-        return any(re.search(pattern, content_lower) for pattern in captcha_patterns)
+        Closes the context and page of the object if they are open.
+        """
+        self._release(self.context)
+        self.driver = None
+        self.context = None
 
     def post_url(
             self, url: str, data: dict | None = None, headers: dict | None = None
@@ -103,22 +256,22 @@ class StealthSearch(BaseSearch):
 
         Returns: The response content as a string, or None if an error occurs.
         """
+        context = None
         try:
-            self._start_driver()
-            if self.driver:
-                if headers:
-                    self.driver.set_extra_http_headers(headers)
-                self.driver.request.post(url, data=data if data else None)
-                content = self.driver.content()
-                return content
-            else:
-                raise self.InvalidResponseError
-        except self.InvalidResponseError as e:
+            context, page = self._acquire()
+            response = page.request.post(url, data=data if data else None, headers=headers)
+            return response.text()
+        except self.CancelledError:
+            raise
+        except Exception as e:
+            self.fetch_failed = True
             if self.logger:
                 self.logger.error(
                     f"Error trying to fetch URL {url} with data {data}: {e}"
                 )
             return ""
+        finally:
+            self._release(context)
 
     def fetch_url(
             self,
@@ -126,6 +279,7 @@ class StealthSearch(BaseSearch):
             scroll: bool = False,
             wait_seconds: int | None = None,
             headers: dict | None = None,
+            wait_for: str | None = None,
     ) -> str | None:
         """
         Fetch the content of the specified URL using the webdriver.
@@ -134,95 +288,253 @@ class StealthSearch(BaseSearch):
         :param scroll: If True, scrolls the page to load dynamic content.
         :param wait_seconds: The number of seconds to wait after page loads.
         :param headers: Optional HTTP headers to include in the request.
+        :param wait_for: CSS selector to wait for instead of sleeping. Waits at most wait_seconds (3 by default).
         :return: The HTML content of the page as a string, or None if an error occurs.
         """
-        self._start_driver()
-        if not self.driver:
-            self._close_driver()
-            return None
-
-        if headers: self.driver.set_extra_http_headers(headers)
-
+        context, page = self._acquire()
         try:
-            self.driver.goto(url)
-            if wait_seconds: self.driver.wait_for_timeout(wait_seconds * 1000)
+            if headers: page.set_extra_http_headers(headers)
+            page.goto(url)
+            self._check_cancelled()
+            if wait_for:
+                try:
+                    page.wait_for_selector(wait_for, timeout=(wait_seconds or 3) * 1000)
+                except PlaywrightTimeoutError:
+                    pass  # Nothing rendered in time, go on with what's there like a plain wait would
+            elif wait_seconds:
+                page.wait_for_timeout(wait_seconds * 1000)
 
             if scroll:  # Scroll to the bottom and back to the top to load dynamic content
                 for _ in range(5):
-                    self.driver.evaluate(
+                    page.evaluate(
                         "window.scrollTo(0, document.body.scrollHeight);"
                     )
-                    self.driver.wait_for_timeout(150)
-                    self.driver.evaluate("window.scrollTo(0, 0);")
-                    self.driver.wait_for_timeout(150)
+                    page.wait_for_timeout(150)
+                    page.evaluate("window.scrollTo(0, 0);")
+                    page.wait_for_timeout(150)
 
-            src = self.driver.content()
+            self._check_cancelled()
+            src = page.content()
+            if len(src) > MAX_BODY_SIZE:
+                if self.logger:
+                    self.logger.warning(f"Response from {url} truncated to {MAX_BODY_SIZE} characters")
+                src = src[:MAX_BODY_SIZE]
             if self._check_for_captcha(src):
                 raise self.CaptchaError
             return src
-        except self.CaptchaError:
+        except (self.CaptchaError, self.CancelledError):
             raise
         except Exception as e:
+            self.fetch_failed = True
             if self.logger:
                 self.logger.error(f"Error: {e}")
         finally:
-            self._close_driver()
+            self._release(context)
         return None
 
 
+    def fetch_urls(self, urls: list[str], scroll: bool = False) -> list[str | None]:
+        """
+        Fetch several URLs at once, each in its own page of a single context on the pooled browser.
+
+        Every navigation is started before waiting for any of them, so the browser loads the pages in parallel
+        while the calling thread stays the only one touching Playwright.
+
+        :param urls: The URLs to fetch through GET requests.
+        :param scroll: If True, scrolls every page to load dynamic content.
+        :return: The HTML content of each page, or None for the pages that failed to load.
+        """
+        context, page = self._acquire()
+        try:
+            pages = [page] + [context.new_page() for _ in urls[1:]]
+            started = []
+            for url, page in zip(urls, pages):
+                try:
+                    page.goto(url, wait_until="commit")  # Returns once the response starts arriving
+                    started.append(True)
+                except Exception as e:
+                    self.fetch_failed = True
+                    started.append(False)
+                    if self.logger:
+                        self.logger.error(f"Error: {e}")
+            self._check_cancelled()
+
+            for page, ok in zip(pages, started):
+                if ok:
+                    try:
+                        page.wait_for_load_state()
+                    except Exception as e:
+                        self.fetch_failed = True
+                        if self.logger:
+                            self.logger.error(f"Error: {e}")
+
+            if scroll:  # Same as fetch_url, every page scrolls during the same waits
+                for _ in range(5):
+                    for page in pages:
+                        page.evaluate("window.scrollTo(0, document.body.scrollHeight);")
+                    pages[0].wait_for_timeout(150)
+                    for page in pages:
+                        page.evaluate("window.scrollTo(0, 0);")
+                    pages[0].wait_for_timeout(150)
+
+            self._check_cancelled()
+            sources = []
+            for url, page, ok in zip(urls, pages, started):
+                src = page.content() if ok else None
+                if src and len(src) > MAX_BODY_SIZE:
+                    if self.logger:
+                        self.logger.warning(f"Response from {url} truncated to {MAX_BODY_SIZE} characters")
+                    src = src[:MAX_BODY_SIZE]
+                if src and self._check_for_captcha(src):
+                    raise self.CaptchaError
+                sources.append(src)
+            return sources
+        except (self.CaptchaError, self.CancelledError):
+            raise
+        except Exception as e:
+            self.fetch_failed = True
+            if self.logger:
+                self.logger.error(f"Error: {e}")
+        finally:
+            self._release(context)
+        return [None] * len(urls)
+
+
 class RequestSearch(BaseSearch):
     def __init__(self, logger: Logger | None = None) -> None:
         """Initializes the Requests-based search object."""
         super().__init__(logger)
 
+    def _read_bytes(self, r: requests.Response) -> bytes:
+        """Read a streamed response, stopping at MAX_BODY_SIZE bytes."""
+        with r:
+            chunks = []
+            total = 0
+            for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+                chunks.append(chunk)
+                total += len(chunk)
+                if total > MAX_BODY_SIZE:
+                    if self.logger:
+                        self.logger.warning(f"Response from {r.url} truncated to {MAX_BODY_SIZE} bytes")
+                    break
+        return b"".join(chunks)[:MAX_BODY_SIZE]
+
     @staticmethod
-    def _check_for_captcha(content: str) -> bool:
-        """Detect common CAPTCHA patterns in the response.
+    def _cache_path(
+            method: str, url: str, data: dict | None = None, headers: dict | None = None
+    ) -> str | None:
+        """Return the HTTP cache entry for a request, or None when the cache is disabled."""
+        if not HTTP_CACHE_ENABLED:
+            return None
+        # Headers like Accept or Authorization change the response, header names are case-insensitive
+        header_key = sorted((name.lower(), value) for name, value in headers.items()) if headers else ''
+        key = f"{method} {url} {sorted(data.items()) if data else ''} {header_key}"
+        return os.path.join(HTTP_CACHE_DIR, blake2b(key.encode(), digest_size=16).hexdigest())
 
-        Args:
-            content (str): The response content to check for CAPTCHA indicators.
+    @staticmethod
+    def _cache_load(path: str | None) -> tuple[bytes, str] | None:
+        """Return the body and encoding of a fresh cache entry."""
+        if path is None:
+            return None
+        try:
+            if os.path.getmtime(path) + HTTP_CACHE_TTL <= time.time():
+                return None
+            with open(path, "rb") as file:
+                encoding, body = file.read().split(b"\n", 1)
+        except (OSError, ValueError):
+            return None
+        return body, encoding.decode()
 
-        Returns:
-            bool: True if CAPTCHA is detected, False otherwise.
-        """
-        captcha_patterns = [
-            r'recaptcha',
-            r'hcaptcha',
-            r'cloudflare.*challenge',
-            r'you.*robot',
-            r'challenge.*page',
-        ]
-        content_lower = content.lower()
-        return any(re.search(pattern, content_lower) for pattern in captcha_patterns)
+    @staticmethod
+    def _cache_store(path: str | None, body: bytes, encoding: str) -> None:
+        if path is None:
+            return
+        try:
+            os.makedirs(HTTP_CACHE_DIR, exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as file:
+                file.write(encoding.encode() + b"\n" + body)
+            os.replace(temp_path, path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _cache_discard(path: str | None) -> None:
+        """Drop an entry that turned out to be unusable, e.g. a captcha page."""
+        if path is None:
+            return
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _send(
+            self, method: str, url: str, data: dict | None = None, headers: dict | None = None
+    ) -> tuple[bytes, str]:
+        """Send a request through the shared session or answer it from the HTTP cache. Returns the body and encoding."""
+        self._check_cancelled()
+        path = self._cache_path(method, url, data, headers)
+        cached = self._cache_load(path)
+        if cached:
+            return cached
+        r = _SESSION.request(
+            method,
+            url=url,
+            data=data if data else None,
+            headers=headers if headers else None,
+            stream=True,
+            timeout=REQUEST_TIMEOUT,
+        )
+        encoding = r.encoding or "utf-8"
+        body = self._read_bytes(r)
+        if r.ok:
+            self._cache_store(path, body, encoding)
+        else:
+            self.fetch_failed = True  # Most likely blocked or down, the body is an error page
+        return body, encoding
 
     def fetch_url(self, url: str, headers: dict | None = None) -> str:
         """Fetch the content of the specified URL using requests."""
         try:
-            r = requests.get(url=url, headers=headers if headers else None)
-            html = r.text
+            body, encoding = self._send("GET", url, headers=headers)
+            html = body.decode(encoding, errors="replace")
             if self._check_for_captcha(html):
+                self._cache_discard(self._cache_path("GET", url, headers=headers))
                 raise self.CaptchaError
             return html
-        except self.CaptchaError:
+        except (self.CaptchaError, self.CancelledError):
             raise
         except Exception as e:
+            self.fetch_failed = True
             if self.logger:
                 self.logger.error(f"Error fetching URL {url} with requests: {e}")
             return ""
 
+    def fetch_json(self, url: str, headers: dict | None = None) -> dict | list:
+        """Fetch a JSON API and decode the raw body, skipping the bytes to str round trip of fetch_url."""
+        try:
+            body, _ = self._send("GET", url, headers=headers)
+            return json_loads(body)
+        except self.CancelledError:
+            raise
+        except Exception as e:
+            self.fetch_failed = True
+            if self.logger:
+                self.logger.error(f"Error fetching JSON from {url} with requests: {e}")
+            return {}
+
     def post_url(
             self, url: str, data: dict | None = None, headers: dict | None = None
     ) -> str:
         """Send a POST request to the URL with optional POST data
         and return the response"""
         try:
-            r = requests.post(
-                url=url,
-                data=data if data else None,
-                headers=headers if headers else None,
-            )
-            return r.text
+            body, encoding = self._send("POST", url, data, headers)
+            return body.decode(encoding, errors="replace")
+        except self.CancelledError:
+            raise
         except Exception as e:
+            self.fetch_failed = True
             if self.logger:
                 self.logger.error(f"Error while POSTing {url} with data {data}: {e}")
             return ""
@@ -1,8 +1,21 @@
-import json
+import re
+from functools import lru_cache
 from logging import Logger
 
+from lib.basesearch import cached_search
 from lib.searchutils import RequestSearch
 
+DANGEROUS_CHARGES = re.compile(r"\b(?:drug|narcotic)", re.I)
+# The notice ID is the value of the second query parameter of the image URL
+NOTICE_ID = re.compile(r"^(?:[^=]*=){2}([^&=]*)")
+
+
+@lru_cache(maxsize=1024)
+def _notice_id_from_url(url: str) -> str:
+    """Extract the notice ID from an image URL. CIB reuses image URLs across entries, so they're memoized."""
+    match = NOTICE_ID.search(url)
+    return match.group(1) if match else ""
+
 
 class CIBSearch(RequestSearch):
     def __init__(self, logging: Logger | None = None) -> None:
@@ -12,46 +25,42 @@ class CIBSearch(RequestSearch):
         self.url = "https://www.cib.npa.gov.tw/en/app/openData/globalcase/list?module=globalcase&mserno=f684c981-0fd0-44a8-a37d-07b100b26ae2&type=json"
 
     def _extract_noticeid(self, entry) -> str:
-        noticeid = entry["images"][0]["fileurl"]
-        noticeid = noticeid.split("=")
-        noticeid = noticeid[2]
-        noticeid = noticeid.split("&")
-        noticeid = noticeid[0]
-        return noticeid
+        return _notice_id_from_url(entry["images"][0]["fileurl"])
 
+    @cached_search
     def search(self, fname: str, lname: str) -> dict | None:
-        json_data: list[dict] = json.loads(self.fetch_url(self.url))
-        fullname = f"{fname} {lname}".upper().replace(
+        json_data: list[dict] = self.fetch_json(self.url)  # type: ignore
+        fullname = self._fullname(fname, lname).replace(
             "-", ""
         )  # Chinese names often have hyphens, but we don't want em
 
-        for entry in json_data:
-            try:
-                # Parse name
-                slname, sfname = (
-                    entry["secSubject"].upper().replace("-", "").split(", ")
-                )  # Again, remove the hyphen
-                sfullname = f"{sfname} {slname}"
-            except:
-                sfullname = entry["secSubject"]
-
-            if self.is_name_match(fullname, sfullname, 60):
-                noticeid = self._extract_noticeid(entry)
-                charges = entry["accusation"].lower().capitalize()
-                risk: str = (
-                    "Dangerous" if ("DRUG" or "NARCOTIC") in charges else "Medium"
-                )
-
-                # Sometimes there are multiple charges
-                charges = charges.split("&amp;")
-
-                res = {
-                    "risk": risk,
-                    "notices": {
-                        "cib-most-wanted": {
-                            "id": noticeid,
-                            "charges": charges,
-                        }
-                    },
+        # Names come as "LASTNAME, FIRSTNAME". Again, remove the hyphen
+        subjects = [entry["secSubject"] for entry in json_data]
+        parsed = [subject.upper().replace("-", "").split(", ") for subject in subjects]
+        snames = [
+            f"{names[1]} {names[0]}" if len(names) == 2 else subject
+            for subject, names in zip(subjects, parsed)
+        ]
+
+        match = self.find_name_match(fullname, snames, 60, hint=lname)
+        if match is None:
+            return None
+
+        entry = json_data[match]
+        noticeid = self._extract_noticeid(entry)
+        charges = entry["accusation"].lower().capitalize()
+        risk: str = "Dangerous" if DANGEROUS_CHARGES.search(charges) else "Medium"
+
+        # Sometimes there are multiple charges
+        charges = charges.split("&amp;")
+
+        res = {
+            "risk": risk,
+            "notices": {
+                "cib-most-wanted": {
+                    "id": noticeid,
+                    "charges": charges,
                 }
-                return self.validate_response(res)
+            },
+        }
+        return self.validate_response(res)
@@ -1,14 +1,33 @@
 import sqlite3
+import threading
 from logging import Logger
 
 from lib.basesearch import BaseSearch
 
 
 class DatabaseSearch(BaseSearch):
+    # Connections are opened once per database file and shared by every search and thread
+    _connections: dict[str, sqlite3.Connection] = {}
+    _lock = threading.Lock()
+
     def __init__(self, db_path, logging: Logger | None = None):
         """Initialize the database connection."""
+        super().__init__(logger=logging)
         self.db_path = db_path
-        self.logger = logging
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """Return the shared connection to db_path, opening and indexing it the first time. Call with _lock held."""
+        connection = self._connections.get(self.db_path)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA temp_store = MEMORY")
+            connection.execute("PRAGMA mmap_size = 268435456")
+            self._connections[self.db_path] = connection
+            try:
+                connection.execute("CREATE INDEX IF NOT EXISTS idx_data_name ON data(fname, lname)")
+            except sqlite3.Error:
+                pass  # Read-only or empty database, lookups still work without the index
+        return connection
 
     def _format_data(self, dbdata) -> dict | None:
         """Format the database data into a structured dictionary."""
@@ -24,16 +43,15 @@ class DatabaseSearch(BaseSearch):
 
     def search(self, first_name: str, last_name: str) -> dict | None:
         """Search for a person by first and last name and retrieve the whole row."""
-        query = "SELECT * FROM data WHERE fname = ? AND lname = ?"
+        query = "SELECT * FROM data WHERE fname = ? AND lname = ? LIMIT 1"
 
         try:
-            with sqlite3.connect(self.db_path) as connection:
-                cursor = connection.cursor()
-                cursor.execute(query, (first_name.title(), last_name.title()))
+            with self._lock:
+                cursor = self._get_connection().execute(query, (first_name.title(), last_name.title()))
                 data = cursor.fetchone()
-                result = self._format_data(data)
+            result = self._format_data(data)
 
-                return self.validate_response(result) if result else None
+            return self.validate_response(result) if result else None
         except sqlite3.Error as e:
             print(f"Database error occurred: {e}")
             return None
@@ -1,7 +1,29 @@
 from logging import Logger
 
+from bs4 import SoupStrainer
+
+from lib.basesearch import cached_search
 from lib.searchutils import StealthSearch
 
+MOST_WANTED_URL = "https://www.fbi.gov/wanted/topten"
+FUGITIVES_URL = "https://www.fbi.gov/wanted/fugitives"
+TERRORISTS_URL = "https://www.fbi.gov/wanted/terrorism"
+MOST_WANTED_SELECTOR = {
+    "tag": "li",
+    "attributes": {"class": "portal-type-person castle-grid-block-item"},
+    "name_tag": "h3",
+    "name_class": {"class": "title"},
+}
+# The fugitive and terrorist lists share a layout
+LIST_SELECTOR = {
+    "tag": "li",
+    "attributes": {"class": "portal-type-person castle-grid-block-item"},
+    "name_tag": "p",
+    "name_class": {"class": "name"},
+    "crime_tag": "h3",
+    "crime_class": {"class": "title"},
+}
+
 
 class FBISearch(StealthSearch):
     def __init__(self, headless: bool = True, logging: Logger | None = None):
@@ -27,9 +49,16 @@ class FBISearch(StealthSearch):
     ) -> dict:
         """Scrape the details of the matched notice and return risk level and charges."""
         soup = self.parse_html(self.fetch_url(notice_url))
-        name_banner = self.extract_text(
-            soup, "h1", {"class": "documentFirstHeading"}, matched_name
+        fields = self.extract_fields(
+            soup,
+            {
+                "name": "h1.documentFirstHeading",
+                "charges": "p.summary",
+                "warning": "h3.wanted-person-warning.panel",
+            },
+            {"name": matched_name, "charges": "Unknown"},
         )
+        name_banner = fields["name"]
 
         if name_banner != matched_name:
             print(
@@ -37,11 +66,8 @@ class FBISearch(StealthSearch):
             )
             return self._default_notice(crime)
 
-        charges = self.extract_text(soup, "p", {"class": "summary"}, "Unknown")
-        warning_banner = self.extract_text(
-            soup, "h3", {"class": "wanted-person-warning panel"}, ""
-        )
-        risk = "Dangerous" if "DANGEROUS" in warning_banner else "High"
+        charges = fields["charges"]
+        risk = "Dangerous" if "DANGEROUS" in fields["warning"] else "High"
 
         return {
             "risk": risk,
@@ -60,82 +86,63 @@ class FBISearch(StealthSearch):
             "notices": {"fbi-most-wanted": {"id": "", "charges": ["Unknown"]}},
         }
 
+    def _match_list(self, html: str | None, fname: str, lname: str, name_selector: dict) -> dict | None:
+        """Find the name in the HTML of a wanted list and scrape the notice of the match."""
+        if not html:
+            return None
+        strainer = SoupStrainer(name_selector["tag"], name_selector["attributes"])
+        soup = self.parse_html(html, strainer)
+
+        fullname = self._fullname(fname, lname)
+        items = soup.find_all(name_selector["tag"], name_selector["attributes"])
+        names = [
+            self.extract_text(item, name_selector["name_tag"], name_selector["name_class"], "")
+            for item in items
+        ]
+
+        match = self.find_name_match(fullname, names, hint=lname)
+        if match is None:
+            return None
+
+        item = items[match]
+        crime = self.extract_text(
+            item,
+            name_selector.get("crime_tag", ""),
+            name_selector.get("crime_class", {}),
+        )
+        return self._scrape_details(item.find("a")["href"], names[match], crime)
+
     def _perform_search(
         self, url: str, fname: str, lname: str, name_selector: dict, scroll: bool = True
     ) -> dict | None:
         """General search method with optional scrolling."""
-        soup = self.parse_html(self.fetch_url(url, scroll=scroll))
-
-        fullname = f"{fname} {lname}".upper()
-        for item in soup.find_all(name_selector["tag"], name_selector["attributes"]):
-            name = self.extract_text(
-                item, name_selector["name_tag"], name_selector["name_class"], ""
-            )
-            if self.is_name_match(fullname, name):
-                crime = self.extract_text(
-                    item,
-                    name_selector.get("crime_tag", ""),
-                    name_selector.get("crime_class", {}),
-                )
-                return self._scrape_details(item.find("a")["href"], name, crime)
-        return None
+        return self._match_list(self.fetch_url(url, scroll=scroll), fname, lname, name_selector)
 
     def _search_most_wanted(self, fname: str, lname: str) -> dict | None:
         """Search FBI's Most Wanted list."""
-        name_selector = {
-            "tag": "li",
-            "attributes": {"class": "portal-type-person castle-grid-block-item"},
-            "name_tag": "h3",
-            "name_class": {"class": "title"},
-        }
-        url = "https://www.fbi.gov/wanted/topten"
-
-        res = self._perform_search(url, fname, lname, name_selector, scroll=False)
-        return res
+        return self._perform_search(MOST_WANTED_URL, fname, lname, MOST_WANTED_SELECTOR, scroll=False)
 
     def _search_fugitives(self, fname: str, lname: str) -> dict | None:
         """Search FBI's Fugitive list."""
-        name_selector = {
-            "tag": "li",
-            "attributes": {"class": "portal-type-person castle-grid-block-item"},
-            "name_tag": "p",
-            "name_class": {"class": "name"},
-            "crime_tag": "h3",
-            "crime_class": {"class": "title"},
-        }
-        url = "https://www.fbi.gov/wanted/fugitives"
-
-        res = self._perform_search(url, fname, lname, name_selector)
-        return res if res else None
+        return self._perform_search(FUGITIVES_URL, fname, lname, LIST_SELECTOR)
 
     def _search_terrorists(self, fname: str, lname: str) -> dict | None:
         """Search FBI's Terrorist list."""
-        name_selector = {
-            "tag": "li",
-            "attributes": {"class": "portal-type-person castle-grid-block-item"},
-            "name_tag": "p",
-            "name_class": {"class": "name"},
-            "crime_tag": "h3",
-            "crime_class": {"class": "title"},
-        }
-        url = "https://www.fbi.gov/wanted/terrorism"
-
-        res = self._perform_search(url, fname, lname, name_selector)
-        return res if res else None
+        return self._perform_search(TERRORISTS_URL, fname, lname, LIST_SELECTOR)
 
+    @cached_search
     def search(self, fname: str, lname: str) -> dict | None:
-        results = []
-        most_wanted = self._search_most_wanted(fname, lname)
-        fugitives = self._search_fugitives(fname, lname)
-        terrorists = self._search_terrorists(fname, lname)
-
-        if not (most_wanted or fugitives or terrorists):
+        # The three lists load at the same time, in pages of one context on the worker's pooled browser.
+        # Scrolling the short Most Wanted list too costs nothing, since every page scrolls during the same waits.
+        lists = [
+            (MOST_WANTED_URL, MOST_WANTED_SELECTOR),
+            (FUGITIVES_URL, LIST_SELECTOR),
+            (TERRORISTS_URL, LIST_SELECTOR),
+        ]
+        pages = self.fetch_urls([url for url, _ in lists], scroll=True)
+        found = (self._match_list(html, fname, lname, selector) for html, (_, selector) in zip(pages, lists))
+        results = [result for result in found if result]
+
+        if not results:
             return None
-        if most_wanted and most_wanted != "":
-            results.append(most_wanted)
-        if fugitives and fugitives != "":
-            results.append(fugitives)
-        if terrorists and terrorists != "":
-            results.append(terrorists)
-
         return self.merge_responses(results)
@@ -1,10 +1,25 @@
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from logging import Logger
-from time import sleep
+from urllib.parse import urljoin
 
-from lib.searchutils import RequestSearch
+import lxml.html
+from bs4 import SoupStrainer
+
+from lib.basesearch import cached_search, has_class
+from lib.searchutils import RateLimiter, RequestSearch
+
+# Every suspect is a div.contenido_elemento holding their name in a h3.nombre-buscado
+_SUSPECT_FILES = "//div[contains(concat(' ', normalize-space(@class), ' '), ' contenido_elemento ')]"
+_SUSPECT_NAME = ".//h3[contains(concat(' ', normalize-space(@class), ' '), ' nombre-buscado ')]"
+# The last page link of the paginator carries the number of pages
+_PAGE_RE = re.compile(r"page=(\d+)")
 
 
 class GuardiaCivilSearch(RequestSearch):
+    MAX_WORKERS = 8  # Pages fetched at the same time
+    _limiter = RateLimiter(1.5)  # Seconds between requests to the site, shared by every search
+
     def __init__(self, logging: Logger | None = None) -> None:
         super().__init__(logger=logging)
         self.searchurl = (
@@ -12,41 +27,55 @@ class GuardiaCivilSearch(RequestSearch):
         )
         self.baseurl = "https://www.guardiacivil.es"
 
+    def _fetch(self, url: str) -> str:
+        """Fetch a page of the site, respecting its rate limit"""
+        self._limiter.wait(url)
+        return self.fetch_url(url) or "<html></html>"
+
+    def _fetch_page(self, url: str, strainer: SoupStrainer | None = None):
+        """Fetch and parse a page with BeautifulSoup"""
+        return self.parse_html(self._fetch(url), strainer)
+
+    def _get_candidates(self, page: int) -> list[tuple[str, str]]:
+        """Return the (name, details path) of every suspect in a page of the list"""
+        tree = lxml.html.fromstring(self._fetch(f"{self.searchurl}?pagina={page}"))
+        candidates = []
+        for file in tree.xpath(_SUSPECT_FILES):
+            name = file.xpath(_SUSPECT_NAME)
+            href = file.xpath(".//a/@href")
+            candidates.append((name[0].text_content().strip() if name else "", href[0] if href else ""))
+        return candidates
+
+    def _search_page(self, page: int, fullname: str, lname: str = "") -> str | None:
+        """Look for the suspect in a page of the list and return the URL of their details"""
+        candidates = self._get_candidates(page)
+        match = self.find_name_match(fullname, [name for name, _ in candidates], hint=lname)
+        if match is None:
+            return None
+        return urljoin(self.baseurl, candidates[match][1])
+
+    @cached_search
     def search(self, fname: str, lname: str) -> dict | None:
-        fullname = f"{fname} {lname}".upper()
+        fullname = self._fullname(fname, lname)
 
         # Find out how many pages are in the database
-        src = self.fetch_url(self.searchurl)
-        soup = self.parse_html(src)
-
-        # Parse the page number
-        page_n = soup.find("div", {"class": "paginacion_contenedor"})  # Find the element
-        page_n = page_n.find("a", {"class": "paginacion_ultima"})  # Find the last page link
-        page_n = page_n["href"]  # Get the href attribute
-        page_n = page_n.split("page=")  # Split to isolate the page number
-        page_n = page_n[1]  # Keep only the page number
-        page_n = int(page_n)  # Cast to an integer for easier processing
-
-        # Loop first around pages
-        details_url = None
-        for page in range(
-                1, page_n + 1
-        ):  # for in range loops are non-inclusive so we add 1 to the range
-            url = f"{self.searchurl}?pagina={page}"
-            soup = self.parse_html(self.fetch_url(url))
-            suspect_files = soup.findAll("div", {"class": "contenido_elemento"})
-
-            for file in suspect_files:
-                name = file.find("h3", {"class": "nombre-buscado"})
-                name = name.get_text().strip()
-
-                if self.is_name_match(fullname, name):
-                    url_temp = file.find("a")
-                    url_temp = url_temp["href"]
-                    details_url = f"{self.baseurl}{url_temp}"
-                    break
-
-            if details_url:
-                return self.gen_response("Dangerous", "guardiacivil-most-wanted", "", "Unknown")
-            sleep(3)
+        soup = self._fetch_page(self.searchurl, SoupStrainer("div", {"class": has_class("paginacion_contenedor")}))
+
+        # Parse the page number from the last page link
+        last_page = soup.select_one("div.paginacion_contenedor a.paginacion_ultima")
+        page_n = int(_PAGE_RE.search(last_page["href"]).group(1))  # type: ignore
+
+        # Search the pages concurrently and stop as soon as one of them has a match
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+            pages = [
+                executor.submit(self._search_page, page, fullname, lname)
+                for page in range(1, page_n + 1)  # for in range loops are non-inclusive so we add 1 to the range
+            ]
+            try:
+                for page in as_completed(pages):
+                    if page.result():
+                        return self.gen_response("Dangerous", "guardiacivil-most-wanted", "", "Unknown")
+            finally:
+                for page in pages:
+                    page.cancel()
         return None
@@ -1,13 +1,31 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from logging import Logger
 from urllib.parse import quote_plus as urlencode
 
-from lib.searchutils import StealthSearch
+from lib.basesearch import cached_search
+from lib.searchutils import RequestSearch
 
+UN_INDEX_TTL = 3600  # Seconds to reuse the UN notices fetched for a last name
+# Both notice types are plain JSON requests on the shared session, so the UN search runs on this
+# small pool next to the red one. No browser is involved, the threads only wait on sockets.
+_NOTICE_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="interpol-notices")
+# The API used to be read through Firefox, keep presenting like it
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64; rv:128.0) Gecko/20100101 Firefox/128.0",
+    "Accept": "application/json",
+}
 
-class InterpolSearch(StealthSearch):
-    def __init__(self, headless: bool = True, logging: Logger | None = None):
+
+class InterpolSearch(RequestSearch):
+    # LNAME -> (expiry, {(FORENAME, NAME): notice}) of the UN notices for that last name, shared by every search
+    _un_index: dict[str, tuple[float, dict[tuple[str, str], dict]]] = {}
+    _un_lock = threading.Lock()
+
+    def __init__(self, logging: Logger | None = None):
         """Initializes the InterpolSearch object, inheriting from BaseSearch."""
-        super().__init__(logger=logging, headless=headless)
+        super().__init__(logger=logging)
 
     def _process_notice(self, notice_data: dict, notice_type: str) -> dict:
         """Process notice data to extract relevant information."""
@@ -31,9 +49,8 @@ class InterpolSearch(StealthSearch):
 
     def _search_red_notices(self, fname: str, lname: str) -> dict | None:
         """Search Interpol Red Notices by first and last name."""
-        search_url = f"https://ws-public.interpol.int/notices/v1/red?name={lname}&forename={fname}"
-        html = self.fetch_url(search_url)
-        src = self.parse_json(html)
+        search_url = f"https://ws-public.interpol.int/notices/v1/red?name={urlencode(lname)}&forename={urlencode(fname)}"
+        src = self.fetch_json(search_url, headers=HEADERS)
 
         if src.get("total", 0) == 0:
             return None
@@ -42,36 +59,56 @@ class InterpolSearch(StealthSearch):
         notice_url = (
             f"https://ws-public.interpol.int/notices/v1/red/{urlencode(noticeid)}"
         )
-        notice_data = self.parse_json(self.fetch_url(notice_url))
+        notice_data = self.fetch_json(notice_url, headers=HEADERS)
         return self.validate_response(self._process_notice(notice_data, "red"))
 
+    def _get_un_index(self, lname: str) -> dict[tuple[str, str], dict]:
+        """
+        Return the UN notices for a last name indexed by upper-cased (forename, name).
+        The API filters by name server-side, and each last name is cached for UN_INDEX_TTL seconds.
+        """
+        key = lname.upper()
+        with self._un_lock:
+            expiry, index = InterpolSearch._un_index.get(key, (0.0, {}))
+            if expiry > time.monotonic():
+                return index
+
+        search_url = f"https://ws-public.interpol.int/notices/v1/un?name={urlencode(lname)}&page=1&resultPerPage=1000"
+        src = self.fetch_json(search_url, headers=HEADERS)
+
+        index = {}
+        for notice in src.get("_embedded", {}).get("notices", []):
+            notice_key = ((notice.get("forename") or "").upper(), (notice.get("name") or "").upper())
+            index.setdefault(notice_key, notice)  # Keep the first notice, like the old linear scan
+
+        # A failed fetch has no "total", don't remember it as "nobody by that name"
+        if "total" in src:
+            now = time.monotonic()
+            with self._un_lock:
+                cache = InterpolSearch._un_index
+                for stale in [k for k, (exp, _) in cache.items() if exp <= now]:
+                    del cache[stale]
+                cache[key] = (now + UN_INDEX_TTL, index)
+        return index
+
     def _search_un_notices(self, fname: str, lname: str) -> dict | None:
         """Search UN Notices by first and last name."""
-        search_url = f"https://ws-public.interpol.int/notices/v1/un?name={lname}&page=1&resultPerPage=1000"
-        html = self.fetch_url(search_url)
-        src = self.parse_json(html)
+        notice = self._get_un_index(lname).get((fname.upper(), lname.upper()))
+        if notice is None:
+            return None
 
-        for notice in src.get("_embedded", {}).get("notices", []):
-            if (
-                notice["forename"].upper() == fname.upper()
-                and notice["name"].upper() == lname.upper()
-            ):
-                noticeid = notice["entity_id"]
-                notice_url = f"https://ws-public.interpol.int/notices/v1/un/persons/{urlencode(noticeid)}"
-                notice_data = self.parse_json(self.fetch_url(notice_url))
-                return self.validate_response(self._process_notice(notice_data, "un"))
-        return None
+        noticeid = notice["entity_id"]
+        notice_url = f"https://ws-public.interpol.int/notices/v1/un/persons/{urlencode(noticeid)}"
+        notice_data = self.fetch_json(notice_url, headers=HEADERS)
+        return self.validate_response(self._process_notice(notice_data, "un"))
 
+    @cached_search
     def search(self, fname: str, lname: str) -> dict | None:
-        results = []
-        red = self._search_red_notices(fname, lname)
-        un = self._search_un_notices(fname, lname)
+        # Red and UN notices come from independent endpoints, so they are fetched at the same time
+        un_notices = _NOTICE_EXECUTOR.submit(self._search_un_notices, fname, lname)
+        red_notices = self._search_red_notices(fname, lname)
+        results = [result for result in (red_notices, un_notices.result()) if result]
 
-        if not (red or un):
+        if not results:
             return None
-        if red:
-            results.append(red)
-        if un:
-            results.append(un)
-
         return self.merge_responses(results)
@@ -1,54 +1,60 @@
 from logging import Logger
 
+import lxml.html
+
+from lib.basesearch import cached_search
 from lib.searchutils import StealthSearch
 
+# Every suspect is a div[itemprop=blogPost] holding their name and charges
+_POSTS = "//div[@itemprop='blogPost']"
+_NAME = "normalize-space(.//div[contains(concat(' ', normalize-space(@class), ' '), ' page-header ')])"
+_CHARGES = "normalize-space(.//div[contains(concat(' ', normalize-space(@class), ' '), ' intro-text ')])"
+
 
 class NCASearch(StealthSearch):
     def __init__(self, headless: bool = True, logging: Logger | None = None):
         super().__init__(logger=logging, headless=headless)
         self.nca_url = "https://www.nationalcrimeagency.gov.uk/most-wanted"
 
-    def _parse_names(self, soup) -> list[dict]:
-        """Parse the raw soup into a loopable list of dictionaries containing the names and URLs"""
-        name_divs = soup.findAll("div", {"itemprop": "blogPost"})
+    def _parse_names(self, tree) -> list[dict]:
+        """Parse the raw tree into a loopable list of dictionaries containing the names and charges"""
         criminals = []
 
-        for div in name_divs:
-            try:
-                name = (
-                    div.find("div", {"class": "page-header"})
-                    .get_text(strip=True)
-                    .upper()
-                )
-                charges = div.find("div", {"class": "intro-text"}).get_text(strip=True)
-                criminals.append({"name": name, "charges": [charges]})
-            except AttributeError as e:
-                print(f"Error parsing entry: {e}")
+        for post in tree.xpath(_POSTS):
+            name = post.xpath(_NAME)
+            charges = post.xpath(_CHARGES)
+            if not name or not charges:
+                if self.logger:
+                    self.logger.warning("Error parsing NCA entry: missing name or charges")
                 continue
 
+            criminals.append({"name": name.upper(), "charges": [charges]})
+
         return criminals
 
+    @cached_search
     def search(self, fname: str, lname: str) -> dict | None:
         """Search UK's NCA most wanted list"""
         try:
             src = self.fetch_url(self.nca_url)
-            soup = self.parse_html(src)
+            tree = lxml.html.fromstring(src)
         except Exception as e:
             print(f"Error fetching or parsing URL: {e}")
             return None
 
-        fullname = f"{fname} {lname}".upper()
+        fullname = self._fullname(fname, lname)
 
         # Parse names and URLs
-        for suspect in self._parse_names(soup):
-            if self.is_name_match(fullname, suspect["name"]):
-                return self.validate_response(
-                    {
-                        "risk": "Dangerous",
-                        "notices": {
-                            "nca-most-wanted": {"id": "", "charges": suspect["charges"]}
-                        },
-                    }
-                )
-
-        return None
+        suspects = self._parse_names(tree)
+        match = self.find_name_match(fullname, [suspect["name"] for suspect in suspects], hint=lname)
+        if match is None:
+            return None
+
+        return self.validate_response(
+            {
+                "risk": "Dangerous",
+                "notices": {
+                    "nca-most-wanted": {"id": "", "charges": suspects[match]["charges"]}
+                },
+            }
+        )
@@ -1,7 +1,21 @@
 from logging import Logger
+from urllib.parse import urljoin
 
+import lxml.html
+
+from lib.basesearch import cached_search
 from lib.searchutils import RequestSearch
 
+# Every suspect is a li of the photo grid, with their name in the alt text of the photo
+_SUSPECTS = "//ul[contains(concat(' ', normalize-space(@class), ' '), ' p-photo-grid__list ')]/li"
+_NAME = "string(.//img[contains(concat(' ', normalize-space(@class), ' '), ' p-photo-grid__img ')]/@alt)"
+_LINK = "string(.//a[contains(concat(' ', normalize-space(@class), ' '), ' p-photo-grid__link ')]/@href)"
+# The details of a suspect are the div.mw-detail rows of their bio
+_DETAIL_ROWS = (
+    "//div[contains(concat(' ', normalize-space(@class), ' '), ' wantedProfileBio ')]"
+    "//div[contains(concat(' ', normalize-space(@class), ' '), ' mw-detail ')]"
+)
+
 
 class NewSouthWalesPoliceSearch(RequestSearch):
     def __init__(self, logging: Logger | None = None):
@@ -12,18 +26,15 @@ class NewSouthWalesPoliceSearch(RequestSearch):
         """Extract the details for a found suspect"""
 
         # Retrieve the site and get the details
-        site = self.fetch_url(url)
-        site = self.parse_html(site)
-        detail_grid = site.find("div", {"class": "wantedProfileBio"})
-        detail_rows = detail_grid.findAll("div", {"class": "mw-detail"})  # type: ignore
+        tree = lxml.html.fromstring(self.fetch_url(url) or "<html></html>")
+        detail_rows = tree.xpath(_DETAIL_ROWS)
 
         # Try to find the charges
         for row in detail_rows:
-            row_text = row.get_text(strip=True)
-            # row_text = row_text.upper()
+            row_text = row.text_content()
 
             if "WANTED FOR" in row_text.upper():  # Found them
-                charges_str: str = row_text.split(":")[1]
+                charges_str: str = row_text.split(":")[1].strip()
                 results = self.gen_response(
                     "High", "newsouthwales-most-wanted", "", [charges_str]
                 )
@@ -33,27 +44,23 @@ class NewSouthWalesPoliceSearch(RequestSearch):
                 f"Suspect was found but we failed retrieving details."
             )
 
+    @cached_search
     def search(self, fname: str, lname: str) -> dict | None:
-        site = self.fetch_url(self.base_url + "wanted")
-        site = self.parse_html(site)
+        tree = lxml.html.fromstring(self.fetch_url(self.base_url + "wanted") or "<html></html>")
 
         # Get the suspect grid
-        suspect_grid = site.find("ul", {"class": "p-photo-grid__list"})
-        suspects = suspect_grid.findAll("li")  # type: ignore
+        suspects = tree.xpath(_SUSPECTS)
 
         # Search inside the grid
-        fullname = (fname + " " + lname).upper()
-        for suspect in suspects:
-            sfullname = suspect.find("img", {"class": "p-photo-grid__img"})[
-                "alt"
-            ].upper()
-
-            if self.is_name_match(fullname, sfullname):  # They're in here
-                url = suspect.find("a", {"class": "p-photo-grid__link"})["href"]
-                url = self.base_url + url
-                try:
-                    notice = self._get_notice(url)
-                    return notice
-                except self.InvalidResponseError as e:
-                    print(f"An error occured during search for {fullname}: {e}")
-                    return None
+        fullname = self._fullname(fname, lname)
+        snames = [suspect.xpath(_NAME) for suspect in suspects]  # Matching is case-insensitive
+        match = self.find_name_match(fullname, snames, hint=lname)
+
+        if match is not None:  # They're in here
+            url = urljoin(self.base_url, suspects[match].xpath(_LINK))
+            try:
+                notice = self._get_notice(url)
+                return notice
+            except self.InvalidResponseError as e:
+                print(f"An error occured during search for {fullname}: {e}")
+                return None
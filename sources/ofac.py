@@ -1,7 +1,18 @@
+import re
 from logging import Logger
+from urllib.parse import urljoin
 
+from bs4 import SoupStrainer
+
+from lib.basesearch import cached_search
 from lib.searchutils import StealthSearch
 
+DANGEROUS_CHARGES = re.compile(r"\b(?:drug|murder|kill|terror)", re.I)
+
+# Only the result count and grid are read from the results page, and only tables from the details page
+_RESULTS_STRAINER = SoupStrainer(id=["ctl00_MainContent_divResults", "gvSearchResults"])
+_DETAILS_STRAINER = SoupStrainer("table")
+
 
 class OFACSearch(StealthSearch):
     def __init__(self, headless: bool = False, logging: Logger | None = None):
@@ -28,17 +39,8 @@ class OFACSearch(StealthSearch):
         )  # Click the search button.
         self.driver.wait_for_load_state("domcontentloaded")
 
-    def _get_details_url(self) -> str:
-        """Gets the URL where the details of the first match are located"""
-
-        if not self.driver:
-            raise ValueError(
-                "Tried to navigate the site but the webdriver hasnt been started"
-            )
-
-        # Load site content
-        site = self.driver.content()
-        soup = self.parse_html(site)
+    def _get_details_url(self, soup) -> str:
+        """Gets the URL where the details of the first match are located from the parsed results page"""
 
         # Parse the grid to find the first occurrence relative URL
         table = soup.find("table", {"id": "gvSearchResults"})
@@ -47,7 +49,7 @@ class OFACSearch(StealthSearch):
         uncomplete_url = col.find("a")["href"]  # type: ignore
 
         # Craft a full URL
-        url = f"{self.ofac_url}{uncomplete_url}"
+        url = urljoin(self.ofac_url, uncomplete_url)
         return url
 
     def _grab_details(self, url: str) -> dict:
@@ -62,7 +64,7 @@ class OFACSearch(StealthSearch):
         self.driver.goto(url)
         self.driver.wait_for_load_state("domcontentloaded")
         site = self.driver.content()
-        soup = self.parse_html(site)
+        soup = self.parse_html(site, _DETAILS_STRAINER)
 
         # Get notice ID
         table = soup.find("table", {"class": "MainTable"})
@@ -70,27 +72,20 @@ class OFACSearch(StealthSearch):
         col = row.findAll("td")[3]  # type: ignore
         notice_id = col.get_text(strip=True)
 
-        # Get the risk-related cell
-        risk_table = soup.find("table", {"id": "ctl00_MainContent_gvIdentification"})
-        risk_row = risk_table.findAll("tr")[1]  # type: ignore
-        risk_col = risk_row.findAll("td")
-        risk_cell = risk_col[0].get_text(strip=True)
+        # The identification table holds both the risk-related cell and the charges
+        ident_table = soup.find("table", {"id": "ctl00_MainContent_gvIdentification"})
+        ident_cols = ident_table.findAll("tr")[1].findAll("td")  # type: ignore
+        risk_cell = ident_cols[0].get_text(strip=True)
 
         # Evaluate risk
-        risk = ""
-        if ("drug" or "murder" or "kill" or "terrorist" or "terrorism") in risk_cell:
-            risk = "Dangerous"
-        else:
-            risk = "High"
+        risk = "Dangerous" if DANGEROUS_CHARGES.search(risk_cell) else "High"
 
         # Evaluate charges
-        table = soup.find("table", {"id": {"ctl00_MainContent_gvIdentification"}})
-        row = table.findAll("tr")[1]  # type: ignore
-        col = row.findAll("td")[1]
-        charges = [col.get_text(strip=True)]
+        charges = [ident_cols[1].get_text(strip=True)]
 
         return self.gen_response(risk, "ofac-sanctions", notice_id, charges)
 
+    @cached_search
     def search(self, fname: str, lname: str) -> dict | None:
         """
         Search the OFAC Sanctions List by name.
@@ -115,7 +110,7 @@ class OFACSearch(StealthSearch):
 
             # Check if there are any results
             site = self.driver.content()
-            soup = self.parse_html(site)
+            soup = self.parse_html(site, _RESULTS_STRAINER)
             div = soup.find("div", {"id": "ctl00_MainContent_divResults"})
             lookup_results = div.get_text(strip=True)  # type: ignore
             lookup_results = lookup_results.split("Lookup Results: ")[1]
@@ -126,7 +121,7 @@ class OFACSearch(StealthSearch):
             if lookup_results < 1:
                 return None
 
-            details_url = self._get_details_url()
+            details_url = self._get_details_url(soup)
             return self._grab_details(details_url)
 
         finally:
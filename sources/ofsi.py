@@ -1,8 +1,6 @@
-import json
 from logging import Logger
 
-import requests
-
+from lib.basesearch import cached_search
 from lib.searchutils import RequestSearch
 
 
@@ -19,6 +17,7 @@ class OFSISearch(RequestSearch):
             - Variable name: searchApiKey
         """
 
+    @cached_search
     def search(self, fname: str, lname: str) -> dict | None:
 
         # Craft the custom request
@@ -34,8 +33,9 @@ class OFSISearch(RequestSearch):
         }
 
         # Get data
-        r = requests.get(url=url, headers=headers)
-        data = json.loads(r.text)
+        data = self.fetch_json(url, headers=headers)
+        if not data.get("value"):
+            return None
         data = data["value"][0]
         # Set results
         risk = "High"
@@ -1,7 +1,10 @@
 from logging import Logger
 from time import sleep
+from urllib.parse import quote_plus, urljoin
 
-from lib.basesearch import BaseSearch
+from bs4 import SoupStrainer
+
+from lib.basesearch import BaseSearch, cached_search, has_class
 from lib.searchutils import StealthSearch
 
 
@@ -10,27 +13,25 @@ class OpenSanctionsSearch(StealthSearch):
         super().__init__(logger=logging, headless=headless)
         self.base_url = "https://www.opensanctions.org"
 
+    @cached_search
     def search(self, fname: str, lname: str) -> dict | None:
         """Search a suspect in OpenSanctions"""
 
         # Search
+        search_url = f"{self.base_url}/search/?q={quote_plus(f'{fname} {lname}')}"
         try:
-            site = self.fetch_url(
-                f"{self.base_url}/search/?q={fname} {lname}", wait_seconds=3
-            )
+            site = self.fetch_url(search_url, wait_seconds=3)
         # Retry if CAPTCHA is found. Won't make a second attempt
         except BaseSearch.CaptchaError:
             sleep(5)
-            site = self.fetch_url(
-                f"{self.base_url}/search/?q={fname} {lname}", wait_seconds=3
-            )
+            site = self.fetch_url(search_url, wait_seconds=3)
 
-        soup = self.parse_html(site)
+        soup = self.parse_html(site, SoupStrainer("div", {"class": has_class("col-md-8")}))
 
         # Get the details URL
         res_list = soup.findAll("div", {"class": "col-md-8"})[1]  # type: ignore
         res_item = res_list.find("a")  # type: ignore
-        details_url = self.base_url + res_item["href"]  # type: ignore
+        details_url = urljoin(self.base_url, res_item["href"])  # type: ignore
 
         # Extract details
         try:
@@ -38,7 +39,7 @@ class OpenSanctionsSearch(StealthSearch):
         except BaseSearch.CaptchaError:
             sleep(5)
             site = self.fetch_url(details_url, wait_seconds=3)
-        soup = self.parse_html(site)
+        soup = self.parse_html(site, SoupStrainer("span", {"class": has_class("badge")}))
 
         # Parse suspect tags
         tags = []
@@ -1,10 +1,30 @@
 import re
 from logging import Logger
+from urllib.parse import urljoin
 
-from lib.searchutils import RequestSearch
+import lxml.html
+from bs4 import SoupStrainer
+from lxml import etree
+
+from lib.basesearch import cached_search
+from lib.searchutils import ListingCache, RequestSearch
+
+# Every suspect file is a card div, holding their name in a h5 and the link to their details
+_FILES = etree.XPath(
+    "//div[@class='col-12 col-md-6 col-lg-4 col-xl-2 my-3 d-flex align-items-stretch justify-content-center m-md-3 m-lg-1']"
+)
+_NAME = etree.XPath("string(.//h5[@class='card-title text-center'])")
+_LINK = etree.XPath("string(.//a/@href)")
+# Names are split across lines with tabs and carriage returns in between
+_NAME_TABLE = str.maketrans({"\t": "", "\r": "", "\n": " "})
+# Charges are listed as "a, b y c"
+_CHARGE_SPLIT = re.compile(r",| y | e ")
 
 
 class PoliciaNacionalSearch(RequestSearch):
+    # [NAME, details URL] of every suspect in the most wanted list, shared by every search
+    _listing = ListingCache("policianacional")
+
     def __init__(self, logging: Logger | None = None) -> None:
         super().__init__(logger=logging)
         self.searchurl = "https://www.policia.es/_es/colabora_masbuscados.php"
@@ -12,30 +32,23 @@ class PoliciaNacionalSearch(RequestSearch):
 
     @staticmethod
     def _parse_name(parentdiv) -> str:
-        res = parentdiv.find("h5", {"class": "card-title text-center"})
-        res = res.get_text(strip=False)
-        res = res.replace("\t", "")
-        res = res.replace("\n", " ")  # Replace the remaining newline with a space
-        res = res.replace("\r", "")  # Replace the carriage return
-        res = res[1:]  # Remove first character, which is a space
-        res = res.upper()
-        return res
+        return _NAME(parentdiv).translate(_NAME_TABLE).strip().upper()
 
-    def _get_charges(self, suspect_file) -> list[str]:
-        # Extract the URL of the details
-        fileurl = suspect_file.find("a")
-        fileurl = fileurl["href"]
-        fileurl = f"{self.baseurl}{fileurl}"
+    def _scrape_listing(self) -> list[list[str]]:
+        """Scrape the [name, details URL] of every suspect in the list"""
+        tree = lxml.html.fromstring(self.fetch_url(self.searchurl) or "<html></html>")
+        return [[self._parse_name(file), urljoin(self.baseurl, _LINK(file))] for file in _FILES(tree)]
 
+    def _get_charges(self, fileurl: str) -> list[str]:
         # Request the file and process it
-        soup = self.parse_html(self.fetch_url(fileurl))
+        soup = self.parse_html(self.fetch_url(fileurl), SoupStrainer("dd"))
         info = soup.findAll("dd", {"class": "col-sm-7"})
         info = info[2]
         info = info.get_text(strip=True)  # type: ignore
         info = info.split("buscado por ")[1]
 
         # Split charges
-        info = re.split(r",| y | e ", info)
+        info = _CHARGE_SPLIT.split(info)
 
         # Parse and clean the charges
         charges = []
@@ -47,27 +60,19 @@ class PoliciaNacionalSearch(RequestSearch):
             charges.append(i)
         return charges
 
+    @cached_search
     def search(self, fname: str, lname: str) -> dict | None:
-        fullname = f"{fname} {lname}".upper()
-        soup = self.parse_html(self.fetch_url(self.searchurl))
+        fullname = self._fullname(fname, lname)
+        listing = self._listing.get(self._scrape_listing)
 
-        # Find all the suspect files
-        files = soup.findAll(
-            "div",
-            {
-                "class": "col-12 col-md-6 col-lg-4 col-xl-2 my-3 d-flex align-items-stretch justify-content-center m-md-3 m-lg-1"
-            },
-        )
+        # Score all of them at once until we get a match
+        match = self.find_name_match(fullname, [name for name, _ in listing], hint=lname)
+        if match is None:
+            return None
 
-        # Loop through them until we get a match
-        for file in files:
-            # Check if it's our guy
-            name = self._parse_name(file)
-            if self.is_name_match(fullname, name):
-                # It's our guy, so parse
-                charges = self._get_charges(file)
-                risk = "Dangerous"
-                source = "policianacional-most-wanted"
-                notice_id = ""
-                return self.gen_response(risk, source, notice_id, charges)
-        return None
+        # It's our guy, so parse
+        charges = self._get_charges(listing[match][1])
+        risk = "Dangerous"
+        source = "policianacional-most-wanted"
+        notice_id = ""
+        return self.gen_response(risk, source, notice_id, charges)
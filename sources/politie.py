@@ -1,9 +1,15 @@
+import re
 from logging import Logger
+from urllib.parse import quote_plus
 
 from bs4 import BeautifulSoup as bs
+from bs4 import SoupStrainer
 
+from lib.basesearch import cached_search, has_class
 from lib.searchutils import StealthSearch
 
+DANGEROUS_CHARGES = re.compile(r"\b(?:murder|narcotics|drugs|traffick)", re.I)
+
 
 class PolitieSearch(StealthSearch):
     def __init__(self, headless: bool = True, logging: Logger | None = None):
@@ -37,12 +43,8 @@ class PolitieSearch(StealthSearch):
         Returns:
             str: Risk level, either 'Dangerous' or 'High'.
         """
-        high_risk_keywords = {"murder", "narcotics", "drugs", "trafficking", "traffick"}
-        for charge in charges:
-            # Check if any high-risk keyword is in the charge description
-            if any(keyword in charge.lower() for keyword in high_risk_keywords):
-                return "Dangerous"
-        return "High"
+        # Scan every charge description for a high-risk keyword at once
+        return "Dangerous" if DANGEROUS_CHARGES.search("\n".join(charges)) else "High"
 
     def _grab_info(self, url: str) -> dict:
         """Extracts suspect information from a specific URL.
@@ -53,28 +55,35 @@ class PolitieSearch(StealthSearch):
         Returns:
             dict: Dictionary containing risk level, case ID, and charges.
         """
-        site = self.parse_html(self.fetch_url(url))
+        # Only the banner (dl) and the description (section) are read from the details page
+        site = self.parse_html(self.fetch_url(url), SoupStrainer(["dl", "section"]))
         banner_data = site.find("dl", {"class": "blok-onderkant-2 metadata-dl"})
 
         # Extract the case ID if available
         case_id = "Unavailable"
         if banner_data:
-            case_text = banner_data.get_text(separator="|", strip=True)
-            if "Case number:" in case_text:
-                try:
-                    case_id = case_text.split("Case number:|")[1].split("|")[0]
-                except IndexError:
-                    pass  # Maintain 'Unavailable' if parsing fails
+            # The case number is the dd right after its dt label
+            label = banner_data.find(
+                lambda tag: tag.name == "dt" and tag.get_text(strip=True) == "Case number:"
+            )
+            value = label.find_next_sibling("dd") if label else None
+            if value and value.get_text(strip=True):
+                case_id = value.get_text(strip=True)
 
         # Extract charges if available
         charges = ["Unavailable"]
         charges_section = site.find("section", {"class": "content-blocks clearfix"})
         if charges_section:
-            charges_text = charges_section.get_text(strip=True, separator="|").split(
-                "|"
-            )
-            if len(charges_text) > 1:
-                charges = charges_text[1:]  # Ignore the first "Description" tag
+            # Every paragraph or list item is a charge, the "Description" heading is left out
+            charges_text = [
+                text
+                for tag in charges_section.find_all(["p", "li"])
+                if (text := tag.get_text(" ", strip=True))
+            ]
+            if not charges_text:  # Plain text description, split it by its text nodes
+                charges_text = list(charges_section.stripped_strings)[1:]
+            if charges_text:
+                charges = charges_text
 
         # Determine risk level
         risk = self._get_risk_score(charges)
@@ -89,6 +98,7 @@ class PolitieSearch(StealthSearch):
             },
         }
 
+    @cached_search
     def search(self, fname: str, lname: str) -> dict | None:
         """Searches for the most wanted person by name.
 
@@ -99,11 +109,10 @@ class PolitieSearch(StealthSearch):
         Returns:
             dict | None: Search results if a match is found, otherwise None.
         """
-        fullname = (
-            f"{fname} {lname}".title()
-        )  # Use titlecase for better search compatibility
-        data = self.fetch_url(f"{self.search_url}{fullname}", wait_seconds=1)
-        bs_data = self.parse_html(data)
+        # Use titlecase for better search compatibility, quoted so accents and symbols survive the URL
+        fullname = quote_plus(f"{fname} {lname}".title())
+        data = self.fetch_url(f"{self.search_url}{fullname}", wait_seconds=1, wait_for="div.overview-item")
+        bs_data = self.parse_html(data, SoupStrainer("div", {"class": has_class("overview-item")}))
 
         # Attempt to find the overview item containing suspect information
         searchlist = bs_data.find("div", {"class": "overview-item"})
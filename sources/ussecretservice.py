@@ -1,18 +1,34 @@
 from logging import Logger
+from urllib.parse import urljoin
 
-from bs4 import BeautifulSoup as bs
+import lxml.html
+from bs4 import SoupStrainer
+from lxml import etree
 
-from lib.searchutils import RequestSearch
+from lib.basesearch import cached_search, has_class
+from lib.searchutils import ListingCache, RequestSearch
+
+# Every suspect is a div.wanted-card, with their name in the h3 of its div.text and a button to their details
+_CARDS = etree.XPath("//div[contains(concat(' ', normalize-space(@class), ' '), ' wanted-card ')]")
+_NAME = etree.XPath(
+    "normalize-space(((.//div[contains(concat(' ', normalize-space(@class), ' '), ' text ')])[1]//h3)[1])"
+)
+_LINK = etree.XPath("string(.//a[contains(concat(' ', normalize-space(@class), ' '), ' usa-button ')]/@href)")
+# Only the reward banner and the main content are read from the details page
+_DETAILS_STRAINER = SoupStrainer(["section", "div"], {"class": has_class("usa-graphic-list", "usa-layout-docs__main")})
 
 
 class SecretServiceSearch(RequestSearch):
+    # [name, details URL] of every suspect in the most wanted list, shared by every search
+    _listing = ListingCache("ussecretservice")
+
     def __init__(self, logging: Logger | None = None):
         super().__init__(logger=logging)
         self.base_url = "https://www.secretservice.gov"
 
     def _get_details(self, details_url: str) -> dict:
         site = self.fetch_url(details_url)
-        site = self.parse_html(site)
+        site = self.parse_html(site, _DETAILS_STRAINER)
 
         risk: str = "High"
         charges: list[str]
@@ -42,31 +58,29 @@ class SecretServiceSearch(RequestSearch):
 
         return self.gen_response(risk, "us-secret-service", "", charges)
 
-    def _process_grid(self, grid: bs, fullname: str) -> str | None:
-        """Check if it's a match and then extract the details URL"""
-
-        for card in grid:
-            name = card.find("div", {"class": "text"})  # type: ignore
+    def _scrape_listing(self) -> list[list[str]]:
+        """Scrape the [name, details URL] of every suspect in the list"""
+        site = self.fetch_url(f"{self.base_url}/investigations/mostwanted")
+        tree = lxml.html.fromstring(site or "<html></html>")
+        return [
+            [_NAME(card), urljoin(self.base_url, href) if (href := _LINK(card)) else ""]  # No link, no details
+            for card in _CARDS(tree)
+        ]
 
-            name = name.find("h3")
-            name = name.get_text(strip=True).upper()
+    def _process_grid(self, grid: list[list[str]], fullname: str, lname: str = "") -> str | None:
+        """Check if it's a match and then extract the details URL"""
 
-            if self.is_name_match(name, fullname):
-                details_url = card.find("a", {"class": "usa-button"})["href"]  # type: ignore
-                details_url = self.base_url + details_url
-                return details_url
+        match = self.find_name_match(fullname, [name for name, _ in grid], hint=lname)
+        if match is not None:
+            return grid[match][1]
         return None
 
+    @cached_search
     def search(self, fname: str, lname: str) -> dict | None:
-        site = self.fetch_url("https://www.secretservice.gov/investigations/mostwanted")
-        site = self.parse_html(site)
-        fullname = f"{fname} {lname}".upper()
-
-        grid = site.findAll(
-            "div", {"class": "wanted-card"}
-        )
-
-        details_url = self._process_grid(grid, fullname)  # type: ignore
+        fullname = self._fullname(fname, lname)
+        grid = self._listing.get(self._scrape_listing)
 
-        details = self._get_details(details_url)
-        return details if details else None
+        details_url = self._process_grid(grid, fullname, lname)
+        if not details_url:  # Nobody matched, or the card has no details to fetch
+            return None
+        return self._get_details(details_url)
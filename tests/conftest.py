@@ -0,0 +1,36 @@
+import copy
+import logging
+from unittest.mock import Mock
+
+import pytest
+
+from lib.basesearch import BaseSearch
+from lib.searchutils import StealthSearch
+
+
+@pytest.fixture(scope="session")
+def _logger_template():
+    """Builds the spec'd logger Mock once, since speccing introspects logging.Logger"""
+    return Mock(spec=logging.Logger)
+
+
+@pytest.fixture
+def logger_mock(_logger_template):
+    """Provides a mock logger for testing"""
+    # A shallow copy shares child mocks with the template, so clear their calls
+    logger = copy.copy(_logger_template)
+    logger.reset_mock()
+    return logger
+
+
+@pytest.fixture(scope="session")
+def base_search():
+    """Provides a shared BaseSearch instance for tests that don't touch its state"""
+    return BaseSearch()
+
+
+@pytest.fixture(scope="session")
+def stealth_browsers():
+    """Lets every browser-based search reuse the worker's browser, closing it once the session ends"""
+    yield
+    StealthSearch.shutdown()
@@ -1,22 +1,27 @@
+import copy
 import json
-import logging
-import warnings
-from contextlib import contextmanager
+from functools import lru_cache
 from unittest.mock import Mock
 
 import pytest
 from bs4 import BeautifulSoup as bs
+from bs4 import SoupStrainer
 
-from lib.basesearch import BaseSearch
+from lib.basesearch import (
+    BaseSearch, SEARCH_CACHE, _RISK_RANK, cached_search, clear_search_cache, has_class, set_search_cache
+)
 
+# These run in milliseconds, keep them together so the shared fixtures and soups are reused
+pytestmark = pytest.mark.xdist_group("basesearch")
 
-# Fixtures for common test setup
-@pytest.fixture
-def logger_mock():
-    """Provides a mock logger for testing"""
-    return Mock(spec=logging.Logger)
 
+@lru_cache(maxsize=None)
+def _soup(html):
+    """Parses each test document once; the extract helpers never mutate the tree"""
+    return bs(html, "lxml")
 
+
+# Fixtures for common test setup
 @pytest.fixture
 def search_with_logger(logger_mock):
     """Provides a BaseSearch instance with a mock logger"""
@@ -29,14 +34,6 @@ def search_without_logger():
     return BaseSearch()
 
 
-@contextmanager
-def ignore_deprecation_warnings():
-    """Context manager to ignore DeprecationWarning for deprecated method testing"""
-    with warnings.catch_warnings():
-        warnings.simplefilter("ignore", DeprecationWarning)
-        yield
-
-
 class TestBaseSearchInit:
     """Test BaseSearch initialization"""
 
@@ -52,6 +49,14 @@ class TestBaseSearchInit:
         assert search.logger is None
         assert search.fuzzy_match_threshold == 85
 
+    def test_context_manager_closes(self):
+        """Test that leaving the with block closes the search"""
+        search = BaseSearch()
+        search.close = Mock()
+        with search as entered:
+            assert entered is search
+        search.close.assert_called_once()
+
     def test_init_with_none_logger(self):
         """Test initialization with None as logger"""
         search = BaseSearch(logger=None)
@@ -69,6 +74,10 @@ class TestBaseSearchRiskLevels:
         """Test that all risk levels are strings"""
         assert all(isinstance(level, str) for level in BaseSearch.RISK_LEVELS)
 
+    def test_risk_rank_mapping(self):
+        """Test that risks are ranked in RISK_LEVELS order"""
+        assert _RISK_RANK == {"Low": 0, "Medium": 1, "High": 2, "Dangerous": 3}
+
 
 class TestGenResponse:
     """Test gen_response static method"""
@@ -101,9 +110,8 @@ class TestGenResponse:
 
     def test_gen_response_invalid_risk(self):
         """Test that invalid risk raises ValueError"""
-        with pytest.raises(ValueError) as exc_info:
+        with pytest.raises(ValueError, match=r"(?i)invalid"):
             BaseSearch.gen_response("Critical", "FBI", "12345", ["Fraud"])
-        assert "invalid" in str(exc_info.value).lower()
 
     def test_gen_response_empty_charges(self):
         """Test generating a response with empty charges list"""
@@ -117,7 +125,23 @@ class TestGenResponse:
         assert result["notices"]["FBI"]["charges"] == charges
 
 
+_VALID_RESPONSE = {"risk": "High", "notices": {"FBI": {"id": "12345", "charges": ["Fraud", "Money Laundering"]}}}
+
+# Each mutation breaks one rule of an otherwise valid response, in place
+INVALID_MUTATIONS = [
+    pytest.param(lambda d: d.pop("risk"), id="missing_risk"),
+    pytest.param(lambda d: d.pop("notices"), id="missing_notices"),
+    pytest.param(lambda d: d.update(risk="InvalidRisk"), id="invalid_risk_value"),
+    pytest.param(lambda d: d.update(notices="not a dict"), id="notices_not_dict"),
+    pytest.param(lambda d: d["notices"]["FBI"].pop("id"), id="missing_id"),
+    pytest.param(lambda d: d["notices"]["FBI"].pop("charges"), id="missing_charges"),
+    pytest.param(lambda d: d["notices"]["FBI"].update(charges="not a list"), id="charges_not_list"),
+    pytest.param(lambda d: d["notices"]["FBI"]["charges"].append(123), id="charge_not_string"),
+]
+
+
 # noinspection PyDeprecation
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
 class TestValidateResponse:
     """Test validate_response method
 
@@ -125,132 +149,50 @@ class TestValidateResponse:
     to the expected structure with proper risk levels and notice formatting.
     """
 
-    def test_validate_valid_response(self):
+    def test_validate_valid_response(self, base_search):
         """Test validating a valid response"""
-        search = BaseSearch()
-        valid_response = {
-            "risk": "High",
-            "notices": {
-                "FBI": {
-                    "id": "12345",
-                    "charges": ["Fraud", "Money Laundering"]
-                }
-            }
-        }
-        with ignore_deprecation_warnings():
-            result = search.validate_response(valid_response)
-        assert result == valid_response
+        result = base_search.validate_response(_VALID_RESPONSE)
+        assert result == _VALID_RESPONSE
 
-    def test_validate_response_not_dict(self):
+    def test_validate_response_not_dict(self, base_search):
         """Test that non-dict response raises InvalidResponseError"""
-        search = BaseSearch()
         with pytest.raises(BaseSearch.InvalidResponseError):
-            with ignore_deprecation_warnings():
-                search.validate_response("not a dict")  # type: ignore
+            base_search.validate_response("not a dict")  # type: ignore
 
-    def test_validate_response_missing_risk(self):
-        """Test that missing 'risk' key raises InvalidResponseError"""
-        search = BaseSearch()
-        invalid_response = {
-            "notices": {
-                "FBI": {"id": "12345", "charges": []}
-            }
-        }
-        with pytest.raises(BaseSearch.InvalidResponseError):
-            with ignore_deprecation_warnings():
-                search.validate_response(invalid_response)
-
-    def test_validate_response_missing_notices(self):
-        """Test that missing 'notices' key raises InvalidResponseError"""
-        search = BaseSearch()
-        invalid_response = {"risk": "High"}
-        with pytest.raises(BaseSearch.InvalidResponseError):
-            with ignore_deprecation_warnings():
-                search.validate_response(invalid_response)
-
-    def test_validate_response_invalid_risk_value(self):
-        """Test that invalid risk value raises InvalidResponseError"""
-        search = BaseSearch()
-        invalid_response = {
-            "risk": "InvalidRisk",
-            "notices": {}
-        }
+    @pytest.mark.parametrize("mutation", INVALID_MUTATIONS)
+    def test_validate_invalid(self, base_search, mutation):
+        """Test that malformed responses raise InvalidResponseError"""
+        payload = copy.deepcopy(_VALID_RESPONSE)
+        mutation(payload)
         with pytest.raises(BaseSearch.InvalidResponseError):
-            with ignore_deprecation_warnings():
-                search.validate_response(invalid_response)
+            base_search.validate_response(payload)
 
-    def test_validate_response_notices_not_dict(self):
-        """Test that non-dict notices raises InvalidResponseError"""
-        search = BaseSearch()
-        invalid_response = {
-            "risk": "High",
-            "notices": "not a dict"
-        }
-        with pytest.raises(BaseSearch.InvalidResponseError):
-            with ignore_deprecation_warnings():
-                search.validate_response(invalid_response)
-
-    def test_validate_response_missing_id(self):
-        """Test that missing 'id' in source details raises InvalidResponseError"""
-        search = BaseSearch()
-        invalid_response = {
-            "risk": "High",
-            "notices": {
-                "FBI": {"charges": []}
-            }
-        }
-        with pytest.raises(BaseSearch.InvalidResponseError):
-            with ignore_deprecation_warnings():
-                search.validate_response(invalid_response)
-
-    def test_validate_response_missing_charges(self):
-        """Test that missing 'charges' raises InvalidResponseError"""
-        search = BaseSearch()
-        invalid_response = {
-            "risk": "High",
-            "notices": {
-                "FBI": {"id": "12345"}
-            }
-        }
-        with pytest.raises(BaseSearch.InvalidResponseError):
-            with ignore_deprecation_warnings():
-                search.validate_response(invalid_response)
-
-    def test_validate_response_charges_not_list(self):
-        """Test that non-list charges raises InvalidResponseError"""
-        search = BaseSearch()
-        invalid_response = {
-            "risk": "High",
-            "notices": {
-                "FBI": {"id": "12345", "charges": "not a list"}
-            }
-        }
-        with pytest.raises(BaseSearch.InvalidResponseError):
-            with ignore_deprecation_warnings():
-                search.validate_response(invalid_response)
-
-    def test_validate_response_charge_not_string(self):
-        """Test that non-string charge raises InvalidResponseError"""
-        search = BaseSearch()
-        invalid_response = {
-            "risk": "High",
-            "notices": {
-                "FBI": {"id": "12345", "charges": ["Fraud", 123]}
-            }
-        }
-        with pytest.raises(BaseSearch.InvalidResponseError):
-            with ignore_deprecation_warnings():
-                search.validate_response(invalid_response)
-
-    def test_validate_response_deprecation_warning(self):
+    def test_validate_response_deprecation_warning(self, base_search):
         """Test that calling validate_response raises a deprecation warning"""
-        search = BaseSearch()
         valid_response = {
             "risk": "Low",
             "notices": {"FBI": {"id": "123", "charges": []}}
         }
         with pytest.warns(DeprecationWarning):
-            search.validate_response(valid_response)
+            base_search.validate_response(valid_response)
+
+
+NAME_MATCH_CASES = [
+    # Exact matches
+    pytest.param("John Smith", "John Smith", 85, True, id="exact"),
+    pytest.param("", "", 85, True, id="both_empty"),
+    pytest.param("a", "a", 85, True, id="single_char"),
+    # Case-insensitive matches
+    pytest.param("john smith", "JOHN SMITH", 85, True, id="case_insensitive"),
+    # Fuzzy matches above default threshold
+    pytest.param("John Smith", "Jon Smith", 85, True, id="fuzzy_first_name"),
+    pytest.param("Michael Johnson", "Michael Jonson", 85, True, id="fuzzy_last_name"),
+    # Fuzzy matches below threshold
+    pytest.param("John Smith", "Albert Johnson", 85, False, id="below_threshold"),
+    # Custom thresholds
+    pytest.param("John Smith", "John Smit", 95, False, id="strict_threshold"),
+    pytest.param("John Smith", "John S", 50, True, id="loose_threshold"),
+]
 
 
 class TestIsNameMatch:
@@ -260,36 +202,72 @@ class TestIsNameMatch:
     Validates both exact and approximate matching scenarios.
     """
 
-    @pytest.mark.parametrize("name1,name2,threshold,expected", [
-        # Exact matches
-        ("John Smith", "John Smith", 85, True),
-        ("", "", 85, True),
-        ("a", "a", 85, True),
-        # Case-insensitive matches
-        ("john smith", "JOHN SMITH", 85, True),
-        # Fuzzy matches above default threshold
-        ("John Smith", "Jon Smith", 85, True),
-        ("Michael Johnson", "Michael Jonson", 85, True),
-        # Fuzzy matches below threshold
-        ("John Smith", "Albert Johnson", 85, False),
-        # Custom thresholds
-        ("John Smith", "John Smit", 95, False),
-        ("John Smith", "John S", 50, True),
-    ])
+    @pytest.mark.parametrize("name1,name2,threshold,expected", NAME_MATCH_CASES)
     def test_is_name_match_various_scenarios(self, name1, name2, threshold, expected):
         """Test name matching with various scenarios and thresholds"""
         assert BaseSearch.is_name_match(name1, name2, threshold=threshold) == expected
 
 
+class TestFindNameMatch:
+    """Test find_name_match static method"""
+
+    def test_find_first_match(self):
+        """Test that the first name meeting the threshold is returned"""
+        names = ["Albert Johnson", "JOHN SMITH", "Jon Smith"]
+        assert BaseSearch.find_name_match("John Smith", names) == 1
+
+    def test_find_no_match(self):
+        """Test that None is returned when no name meets the threshold"""
+        assert BaseSearch.find_name_match("John Smith", ["Albert Johnson"]) is None
+
+    def test_find_exact_match_first(self):
+        """Test that an exact match wins over an earlier fuzzy one"""
+        names = ["Jon Smith", "john smith"]
+        assert BaseSearch.find_name_match("JOHN SMITH", names) == 1
+
+    def test_find_with_hint(self):
+        """Test that names containing the hint are scored first, falling back to the rest"""
+        names = ["JOHN SMYTH", "Jon Smith"]
+        assert BaseSearch.find_name_match("John Smith", names) == 0
+        assert BaseSearch.find_name_match("John Smith", names, hint="Smith") == 1
+        assert BaseSearch.find_name_match("John Smyth", ["Albert Johnson", "John Smith"], hint="Smyth") == 1
+        assert BaseSearch.find_name_match("John Smith", ["Albert Johnson"], hint="Smith") is None
+
+
+class TestFullname:
+    """Test _fullname static method"""
+
+    def test_fullname(self):
+        """Test that the full name is joined and upper-cased"""
+        assert BaseSearch._fullname("John", "Smith") == "JOHN SMITH"
+
+    def test_fullname_cached(self):
+        """Test that repeated names are served from the cache"""
+        first = BaseSearch._fullname("Jane", "Doe")
+        assert BaseSearch._fullname("Jane", "Doe") is first
+
+
+@pytest.fixture(scope="module", params=[
+    ("<html><body><p>Hello</p></body></html>", "Hello"),
+    ("", None),
+    ("<div><p>Unclosed", "Unclosed"),
+    ("<p>Special &amp; characters &lt;test&gt;</p>", "Special & characters <test>"),
+], ids=["simple", "empty", "malformed", "special_characters"])
+def html_case(request):
+    """Provides an HTML document and a text snippet its parse must contain"""
+    return request.param
+
+
 class TestParseHtml:
     """Test parse_html static method"""
 
-    def test_parse_simple_html(self):
-        """Test parsing simple HTML"""
-        html = "<html><body><p>Hello</p></body></html>"
+    def test_parse_html_cases(self, html_case):
+        """Test parsing well-formed, empty, malformed and escaped HTML"""
+        html, needle = html_case
         result = BaseSearch.parse_html(html)
         assert isinstance(result, bs)
-        assert result.find("p").get_text() == "Hello"
+        if needle:
+            assert needle in result.get_text()
 
     def test_parse_html_with_attributes(self):
         """Test parsing HTML with attributes"""
@@ -297,22 +275,22 @@ class TestParseHtml:
         result = BaseSearch.parse_html(html)
         assert result.find("span", {"id": "test"}).get_text() == "Content"
 
-    def test_parse_empty_html(self):
-        """Test parsing empty HTML"""
-        result = BaseSearch.parse_html("")
-        assert isinstance(result, bs)
+    def test_parse_html_with_strainer(self):
+        """Test that a strainer only keeps the matching elements"""
+        html = '<div class="keep"><p>Kept</p></div><div class="drop">Dropped</div>'
+        result = BaseSearch.parse_html(html, SoupStrainer("div", {"class": "keep"}))
+        assert result.find("p").get_text() == "Kept"
+        assert result.find("div", {"class": "drop"}) is None
 
-    def test_parse_malformed_html(self):
-        """Test parsing malformed HTML"""
-        html = "<div><p>Unclosed"
-        result = BaseSearch.parse_html(html)
-        assert isinstance(result, bs)
+    def test_parse_html_with_class_strainer(self):
+        """Test that has_class matches elements carrying more than one class"""
+        html = '<span class="badge bg-dark">Wanted</span><span class="label">Other</span>'
+        result = BaseSearch.parse_html(html, SoupStrainer("span", {"class": has_class("badge")}))
+        assert [tag.get_text() for tag in result.find_all("span")] == ["Wanted"]
 
-    def test_parse_html_with_special_characters(self):
-        """Test parsing HTML with special characters"""
-        html = "<p>Special &amp; characters &lt;test&gt;</p>"
-        result = BaseSearch.parse_html(html)
-        assert "Special & characters <test>" in result.get_text()
+
+_COMPLEX_JSON_DATA = {"nested": {"key": "value"}, "array": [1, 2, 3]}
+_COMPLEX_JSON_HTML = f"<pre>{json.dumps(_COMPLEX_JSON_DATA)}</pre>"
 
 
 class TestParseJson:
@@ -322,34 +300,28 @@ class TestParseJson:
     for malformed JSON and missing HTML elements.
     """
 
-    def test_parse_valid_json_in_pre(self):
+    def test_parse_valid_json_in_pre(self, base_search):
         """Test parsing valid JSON from <pre> element"""
-        search = BaseSearch()
         html = '<html><pre>{"key": "value", "number": 42}</pre></html>'
-        result = search.parse_json(html)
+        result = base_search.parse_json(html)
         assert result["key"] == "value"
         assert result["number"] == 42
 
-    def test_parse_complex_json(self):
+    def test_parse_complex_json(self, base_search):
         """Test parsing complex JSON structure"""
-        search = BaseSearch()
-        json_data = {"nested": {"key": "value"}, "array": [1, 2, 3]}
-        html = f'<pre>{json.dumps(json_data)}</pre>'
-        result = search.parse_json(html)
-        assert result == json_data
+        result = base_search.parse_json(_COMPLEX_JSON_HTML)
+        assert result == _COMPLEX_JSON_DATA
 
-    def test_parse_json_no_pre_element(self):
+    def test_parse_json_no_pre_element(self, base_search):
         """Test parsing when no <pre> element exists"""
-        search = BaseSearch()
         html = '<html><body><div>{"invalid": "json"}</div></body></html>'
-        result = search.parse_json(html)
+        result = base_search.parse_json(html)
         assert result == {}
 
-    def test_parse_json_invalid_json(self):
+    def test_parse_json_invalid_json(self, base_search):
         """Test parsing invalid JSON in <pre> element"""
-        search = BaseSearch()
         html = '<pre>{"invalid json without closing brace</pre>'
-        result = search.parse_json(html)
+        result = base_search.parse_json(html)
         assert result == {}
 
     def test_parse_json_with_logger(self, logger_mock):
@@ -368,18 +340,26 @@ class TestParseJson:
         assert result == {}
         logger_mock.error.assert_called_once()
 
-    def test_parse_json_empty_pre(self):
+    def test_parse_json_pre_with_attributes(self, base_search):
+        """Test parsing JSON from a <pre> element carrying attributes"""
+        html = '<PRE style="word-wrap: break-word;">{"key": "value"}</PRE>'
+        assert base_search.parse_json(html) == {"key": "value"}
+
+    def test_parse_json_skips_other_pre_tags(self, base_search):
+        """Test elements whose name starts with "pre" are not taken for a <pre>"""
+        html = '<preview>{"key": "wrong"}</pre><pre>{"key": "value"}</pre>'
+        assert base_search.parse_json(html) == {"key": "value"}
+
+    def test_parse_json_empty_pre(self, base_search):
         """Test parsing empty <pre> element"""
-        search = BaseSearch()
         html = '<pre></pre>'
-        result = search.parse_json(html)
+        result = base_search.parse_json(html)
         assert result == {}
 
-    def test_parse_json_whitespace_in_pre(self):
+    def test_parse_json_whitespace_in_pre(self, base_search):
         """Test parsing JSON with whitespace in <pre> element"""
-        search = BaseSearch()
         html = '<pre>  {"key": "value"}  </pre>'
-        result = search.parse_json(html)
+        result = base_search.parse_json(html)
         assert result["key"] == "value"
 
 
@@ -390,54 +370,46 @@ class TestExtractText:
     scenarios including nested elements, attributes, and edge cases.
     """
 
-    def test_extract_existing_element(self):
-        """Test extracting text from existing element"""
-        html = '<html><div class="content">Hello World</div></html>'
-        soup = bs(html, "html.parser")
-        result = BaseSearch.extract_text(soup, "div", {"class": "content"})
-        assert result == "Hello World"
-
-    def test_extract_nonexistent_element(self):
-        """Test extracting from non-existent element returns default"""
-        html = '<html><div>Content</div></html>'
-        soup = bs(html, "html.parser")
-        result = BaseSearch.extract_text(soup, "span")
-        assert result == ""
-
-    def test_extract_custom_default(self):
-        """Test extracting with custom default value"""
-        html = '<html><div>Content</div></html>'
-        soup = bs(html, "html.parser")
-        result = BaseSearch.extract_text(soup, "span", default="Not Found")
-        assert result == "Not Found"
-
-    def test_extract_text_with_whitespace(self):
-        """Test that text is stripped of whitespace"""
-        html = '<div>  \n  Content  \n  </div>'
-        soup = bs(html, "html.parser")
-        result = BaseSearch.extract_text(soup, "div")
-        assert result == "Content"
-
-    def test_extract_text_by_id(self):
-        """Test extracting text using id attribute"""
-        html = '<html><p id="target">Targeted Content</p></html>'
-        soup = bs(html, "html.parser")
-        result = BaseSearch.extract_text(soup, "p", {"id": "target"})
-        assert result == "Targeted Content"
-
-    def test_extract_nested_text(self):
-        """Test extracting text from nested elements"""
-        html = '<html><div><span><p>Nested Content</p></span></div></html>'
-        soup = bs(html, "html.parser")
-        result = BaseSearch.extract_text(soup, "p")
-        assert result == "Nested Content"
-
-    def test_extract_text_with_special_chars(self):
-        """Test extracting text with special characters"""
-        html = '<div>Special &amp; chars &lt;test&gt;</div>'
-        soup = bs(html, "html.parser")
-        result = BaseSearch.extract_text(soup, "div")
-        assert "Special & chars <test>" in result
+    @pytest.mark.parametrize("html,name,attrs,default,expected", [
+        pytest.param('<html><div class="content">Hello World</div></html>', "div", {"class": "content"}, "",
+                     "Hello World", id="existing_element"),
+        pytest.param('<html><div>Content</div></html>', "span", None, "", "", id="nonexistent_element"),
+        pytest.param('<html><div>Content</div></html>', "span", None, "Not Found", "Not Found",
+                     id="custom_default"),
+        pytest.param('<div>  \n  Content  \n  </div>', "div", None, "", "Content", id="whitespace"),
+        pytest.param('<html><p id="target">Targeted Content</p></html>', "p", {"id": "target"}, "",
+                     "Targeted Content", id="by_id"),
+        pytest.param('<html><div><span><p>Nested Content</p></span></div></html>', "p", None, "",
+                     "Nested Content", id="nested"),
+        pytest.param('<div>Special &amp; chars &lt;test&gt;</div>', "div", None, "", "Special & chars <test>",
+                     id="special_chars"),
+    ])
+    def test_extract_text(self, html, name, attrs, default, expected):
+        """Test extracting stripped text, falling back to the default when nothing matches"""
+        soup = _soup(html)
+        assert BaseSearch.extract_text(soup, name, attrs, default=default) == expected
+
+
+class TestExtractFields:
+    """Test extract_fields static method"""
+
+    def test_extract_multiple_fields(self):
+        """Test extracting several fields at once"""
+        html = '<h1 class="title"> John Doe </h1><p class="summary">Fraud</p><p class="summary">Other</p>'
+        soup = BaseSearch.parse_html(html)
+        result = BaseSearch.extract_fields(soup, {"name": "h1.title", "charges": "p.summary"})
+        assert result == {"name": "John Doe", "charges": "Fraud"}
+
+    def test_extract_fields_defaults(self):
+        """Test that missing fields fall back to their default or an empty string"""
+        soup = BaseSearch.parse_html("<div>Content</div>")
+        result = BaseSearch.extract_fields(soup, {"name": "h1", "charges": "p"}, {"charges": "Unknown"})
+        assert result == {"name": "", "charges": "Unknown"}
+
+
+# merge_responses copies what it merges, so these are safe to share between tests
+_FBI_LOW_FRAUD = {"risk": "Low", "notices": {"FBI": {"id": "123", "charges": ["Fraud"]}}}
+_INTERPOL_MEDIUM_THEFT = {"risk": "Medium", "notices": {"Interpol": {"id": "456", "charges": ["Theft"]}}}
 
 
 class TestMergeResponses:
@@ -451,8 +423,7 @@ class TestMergeResponses:
 
     def test_merge_single_response(self):
         """Test that merging a single response returns it unchanged"""
-        responses = [{"risk": "Low", "notices": {"FBI": {"id": "123", "charges": ["Fraud"]}}}]
-        result = BaseSearch.merge_responses(responses)
+        result = BaseSearch.merge_responses([_FBI_LOW_FRAUD])
         assert result["risk"] == "Low"
         assert result["notices"]["FBI"]["id"] == "123"
 
@@ -463,21 +434,13 @@ class TestMergeResponses:
 
     def test_merge_duplicate_source_deduplicates_charges(self):
         """Test merging responses from the same source deduplicates charges"""
-        responses = [
-            {"risk": "Low", "notices": {"FBI": {"id": "123", "charges": ["Fraud"]}}},
-            {"risk": "Low", "notices": {"FBI": {"id": "123", "charges": ["Fraud"]}}}
-        ]
-        result = BaseSearch.merge_responses(responses)
+        result = BaseSearch.merge_responses([_FBI_LOW_FRAUD, _FBI_LOW_FRAUD])
         assert result["risk"] == "Low"
         assert result["notices"]["FBI"]["charges"] == ["Fraud"]
 
     def test_merge_multiple_sources(self):
         """Test merging responses from different sources"""
-        responses = [
-            {"risk": "Low", "notices": {"FBI": {"id": "123", "charges": ["Fraud"]}}},
-            {"risk": "Medium", "notices": {"Interpol": {"id": "456", "charges": ["Theft"]}}}
-        ]
-        result = BaseSearch.merge_responses(responses)
+        result = BaseSearch.merge_responses([_FBI_LOW_FRAUD, _INTERPOL_MEDIUM_THEFT])
         assert "FBI" in result["notices"]
         assert "Interpol" in result["notices"]
 
@@ -561,6 +524,12 @@ class TestMergeResponses:
         assert "Interpol" in result["notices"]
         assert "metadata" in result
 
+    def test_merge_leaves_inputs_untouched(self):
+        """Test that merging never mutates the responses it is given"""
+        result = BaseSearch.merge_responses([_FBI_LOW_FRAUD, _FBI_LOW_FRAUD])
+        result["notices"]["FBI"]["charges"].append("Theft")
+        assert _FBI_LOW_FRAUD["notices"]["FBI"]["charges"] == ["Fraud"]
+
     def test_merge_nested_dict_override(self):
         """Test that non-matching nested dict keys are merged"""
         responses = [
@@ -572,25 +541,110 @@ class TestMergeResponses:
         assert result["data"]["key2"] == "value2"
 
 
-class TestExceptions:
-    """Test exception classes"""
+class TestCachedSearch:
+    """Test the cached_search decorator"""
+
+    class CountingSearch(BaseSearch):
+        calls = 0
+
+        @cached_search
+        def search(self, fname, lname):
+            type(self).calls += 1
+            if fname == "Broken":
+                self.fetch_failed = True  # What the fetch helpers do when a request errors out
+            return {"risk": "Low", "notices": {}} if fname == "John" else None
+
+    def setup_method(self):
+        clear_search_cache()
+        self.CountingSearch.calls = 0
+
+    def teardown_method(self):
+        set_search_cache(True)
+
+    def test_repeated_search_is_cached(self):
+        """Test that a repeated search is served from the cache, ignoring case"""
+        first = self.CountingSearch().search("John", "Doe")
+        second = self.CountingSearch().search("JOHN", "doe")
+        assert first is second
+        assert self.CountingSearch.calls == 1
+
+    def test_missing_results_are_cached(self):
+        """Test that searches without results are cached too"""
+        assert self.CountingSearch().search("Jane", "Doe") is None
+        assert self.CountingSearch().search("Jane", "Doe") is None
+        assert self.CountingSearch.calls == 1
+
+    def test_failed_fetches_are_not_cached(self):
+        """Test that a search whose fetch failed is retried instead of cached as a miss"""
+        assert self.CountingSearch().search("Broken", "Doe") is None
+        assert self.CountingSearch().search("Broken", "Doe") is None
+        assert self.CountingSearch.calls == 2
+        assert not SEARCH_CACHE
+
+    def test_disabled_cache_is_bypassed(self):
+        """Test that nothing is cached or served while the cache is disabled"""
+        set_search_cache(False)
+        self.CountingSearch().search("John", "Doe")
+        self.CountingSearch().search("John", "Doe")
+        assert self.CountingSearch.calls == 2
+        assert not SEARCH_CACHE
+
+    def test_clear_search_cache(self):
+        """Test that clearing the cache forces a fresh search"""
+        self.CountingSearch().search("John", "Doe")
+        clear_search_cache()
+        self.CountingSearch().search("John", "Doe")
+        assert self.CountingSearch.calls == 2
+
+
+class TestCheckForCaptcha:
+    """Test _check_for_captcha static method"""
+
+    @pytest.mark.parametrize("content", [
+        '<script src="https://www.google.com/ReCaptcha/api.js"></script>',
+        '<div class="h-captcha" data-sitekey="x"></div><script src="https://js.hCaptcha.com/1/api.js"></script>',
+        "<title>Just a moment...</title><p>Cloudflare Challenge</p>",
+        "<p>Please confirm YOU are not a ROBOT</p>",
+        "<h1>Challenge Page</h1>",
+    ], ids=["recaptcha", "hcaptcha", "cloudflare", "robot", "challenge_page"])
+    def test_captcha_detected(self, content):
+        """Test the CAPTCHA patterns are matched regardless of case"""
+        assert BaseSearch._check_for_captcha(content)
+
+    @pytest.mark.parametrize("content", [
+        '<script src="https://www.google.com/ReCaptcha/api.js"></script>',
+        "<html><body><p>No records found</p></body></html>",
+    ], ids=["captcha", "clean"])
+    def test_content_is_not_lowered(self, content):
+        """Test the check is case-insensitive without copying the content to lower it"""
+        class NoLowerStr(str):
+            def lower(self):
+                raise AssertionError("content was lowered")
+
+        assert BaseSearch._check_for_captcha(NoLowerStr(content)) == ("captcha" in content.lower())
+
+    @pytest.mark.parametrize("content", [
+        "",
+        "<html><body><p>No records found</p></body></html>",
+        "<p>The robot was arrested</p><p>Challenge accepted</p>",
+    ], ids=["empty", "clean", "markers_only"])
+    def test_captcha_not_detected(self, content):
+        """Test clean pages, even containing the prefilter markers, are not flagged"""
+        assert not BaseSearch._check_for_captcha(content)
 
-    def test_invalid_response_error_exception(self):
-        """Test InvalidResponseError can be raised and caught"""
-        BaseSearch()
-        with pytest.raises(BaseSearch.InvalidResponseError):
-            raise BaseSearch.InvalidResponseError()
 
-    def test_captcha_error_exception(self):
-        """Test CaptchaError can be raised and caught"""
-        BaseSearch()
-        with pytest.raises(BaseSearch.CaptchaError):
-            raise BaseSearch.CaptchaError()
-
-    def test_invalid_response_error_is_exception(self):
-        """Test InvalidResponseError is an Exception"""
-        assert issubclass(BaseSearch.InvalidResponseError, Exception)
+class TestExceptions:
+    """Test exception classes"""
 
-    def test_captcha_error_is_exception(self):
-        """Test CaptchaError is an Exception"""
-        assert issubclass(BaseSearch.CaptchaError, Exception)
+    @pytest.mark.parametrize("error", [BaseSearch.InvalidResponseError, BaseSearch.CaptchaError],
+                             ids=["invalid_response", "captcha"])
+    def test_error_can_be_raised(self, error):
+        """Test the search errors can be raised and caught"""
+        with pytest.raises(error):
+            raise error()
+
+    @pytest.mark.parametrize("error", [BaseSearch.InvalidResponseError, BaseSearch.CaptchaError],
+                             ids=["invalid_response", "captcha"])
+    def test_error_is_exception(self, error):
+        """Test the search errors are Exceptions"""
+        assert issubclass(error, Exception)
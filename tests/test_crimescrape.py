@@ -0,0 +1,108 @@
+import importlib
+import sys
+from unittest.mock import patch
+
+import pytest
+from flask import jsonify
+
+pytestmark = pytest.mark.xdist_group("crimescrape")
+
+
+@pytest.fixture(scope="module")
+def crimescrape():
+    """Imports the app in API mode; the arguments are parsed at import time"""
+    with patch.object(sys, "argv", ["crimescrape.py", "--api", "--nocache"]):
+        return importlib.import_module("crimescrape")
+
+
+@pytest.fixture
+def client(crimescrape, monkeypatch):
+    """Provides a test client whose routes echo the validated query instead of searching"""
+    def fake_search(query, cache_type, **kwargs):
+        return jsonify({"type": cache_type, "query": query})
+
+    monkeypatch.setattr(crimescrape, "perform_search", fake_search)
+    return crimescrape.app.test_client()
+
+
+class TestIsIp:
+    """Test is_ip"""
+
+    @pytest.mark.parametrize("host", ["127.0.0.1", "8.8.8.8", "::1", "2001:db8::8a2e:370:7334"])
+    def test_valid(self, crimescrape, host):
+        assert crimescrape.is_ip(host)
+
+    @pytest.mark.parametrize("host", ["", "256.1.1.1", "1.2.3", "example.com", "2001:db8::g1", "1.2.3.4/24"])
+    def test_invalid(self, crimescrape, host):
+        assert not crimescrape.is_ip(host)
+
+
+class TestIsPhone:
+    """Test is_phone"""
+
+    @pytest.mark.parametrize("phone", [
+        "5551234", "+34600123456", "+1 (555) 123-4567", "555.123.4567", "123456789012345",
+    ])
+    def test_valid(self, crimescrape, phone):
+        assert crimescrape.is_phone(phone)
+
+    @pytest.mark.parametrize("phone", [
+        "", "+", "123456", "1234567890123456", "++34600123456", "34+600123456", "555-CALL-NOW", "٥٥٥١٢٣٤٥",
+    ], ids=["empty", "plus_only", "too_short", "too_long", "double_plus", "inner_plus", "letters", "non_ascii"])
+    def test_invalid(self, crimescrape, phone):
+        assert not crimescrape.is_phone(phone)
+
+
+class TestConverterRoutes:
+    """Test the URL converters accept valid input and answer 404 to the rest"""
+
+    @pytest.mark.parametrize("host", ["127.0.0.1", "::1", "2001:db8::1", "example.com", "sub-domain.example.co.uk"])
+    def test_valid_host(self, client, host):
+        response = client.get(f"/api/searchHost/{host}")
+        assert response.status_code == 200
+        assert response.get_json() == {"type": "host", "query": host}
+
+    @pytest.mark.parametrize("host", ["-example.com", "example..com", "exa_mple.com", "2001:db8::g1", "1.2.3.4:80"])
+    def test_invalid_host(self, client, host):
+        assert client.get(f"/api/searchHost/{host}").status_code == 404
+
+    @pytest.mark.parametrize("phone", ["5551234", "+34600123456", "+1 (555) 123-4567"])
+    def test_valid_phone(self, client, phone):
+        response = client.get(f"/api/searchPhone/{phone}")
+        assert response.status_code == 200
+        assert response.get_json() == {"type": "phone", "query": phone}
+
+    @pytest.mark.parametrize("phone", ["123", "+", "+34 600 12a 456", "1234567890123456", "34+600123456"])
+    def test_invalid_phone(self, client, phone):
+        assert client.get(f"/api/searchPhone/{phone}").status_code == 404
+
+    @pytest.mark.parametrize("email", ["john.doe@example.com", "a+tag@mail.example.org"])
+    def test_valid_email(self, client, email):
+        response = client.get(f"/api/searchEmail/{email}")
+        assert response.status_code == 200
+        assert response.get_json() == {"type": "email", "query": email}
+
+    @pytest.mark.parametrize("email", ["john.doe", "john@localhost", "@example.com", "john doe@example.com"])
+    def test_invalid_email(self, client, email):
+        assert client.get(f"/api/searchEmail/{email}").status_code == 404
+
+    @pytest.mark.parametrize("path, expected", [
+        ("/api/searchHost/example.com/", {"type": "host", "query": "example.com"}),
+        ("/api/searchPhone/+34600123456/", {"type": "phone", "query": "+34600123456"}),
+        ("/api/searchEmail/john.doe@example.com/", {"type": "email", "query": "john.doe@example.com"}),
+    ], ids=["host", "phone", "email"])
+    def test_trailing_slash(self, client, path, expected):
+        """Test strict_slashes=False routes a trailing slash without a redirect"""
+        response = client.get(path)
+        assert response.status_code == 200
+        assert response.get_json() == expected
+
+
+class TestExecutorFor:
+    """Test browser sources are kept on the bounded browser pool"""
+
+    def test_browser_source(self, crimescrape):
+        assert crimescrape.executor_for(crimescrape.FBISearch()) is crimescrape.BROWSER_EXECUTOR
+
+    def test_request_source(self, crimescrape):
+        assert crimescrape.executor_for(crimescrape.CIBSearch()) is crimescrape.EXECUTOR
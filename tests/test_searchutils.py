@@ -0,0 +1,190 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, Mock
+
+import pytest
+
+from lib import searchutils
+from lib.searchutils import RequestSearch, StealthSearch
+
+pytestmark = pytest.mark.xdist_group("searchutils")
+
+
+def _response(body=b"<p>ok</p>", ok=True):
+    """Builds a streamed requests.Response stand-in"""
+    response = MagicMock()
+    response.__enter__.return_value = response
+    response.ok = ok
+    response.encoding = "utf-8"
+    response.url = "https://example.com"
+    response.iter_content.return_value = [body]
+    return response
+
+
+@pytest.fixture
+def session(monkeypatch, tmp_path):
+    """Enables the HTTP cache in a temporary directory and replaces the shared session"""
+    monkeypatch.setattr(searchutils, "HTTP_CACHE_ENABLED", True)
+    monkeypatch.setattr(searchutils, "HTTP_CACHE_DIR", str(tmp_path))
+    session = Mock()
+    session.request.return_value = _response()
+    monkeypatch.setattr(searchutils, "_SESSION", session)
+    return session
+
+
+@pytest.fixture
+def search():
+    return RequestSearch()
+
+
+class TestHttpCache:
+    """Test the on-disk HTTP cache of RequestSearch"""
+
+    def test_response_is_cached(self, session, search):
+        """Test a second fetch is answered from the cache"""
+        assert search.fetch_url("https://example.com") == "<p>ok</p>"
+        assert search.fetch_url("https://example.com") == "<p>ok</p>"
+        assert session.request.call_count == 1
+
+    def test_disabled_cache_is_skipped(self, session, search, monkeypatch, tmp_path):
+        """Test nothing is stored when the cache is disabled"""
+        monkeypatch.setattr(searchutils, "HTTP_CACHE_ENABLED", False)
+        search.fetch_url("https://example.com")
+        search.fetch_url("https://example.com")
+        assert session.request.call_count == 2
+        assert not os.listdir(tmp_path)
+
+    def test_expired_entry_is_refetched(self, session, search):
+        """Test entries older than HTTP_CACHE_TTL are ignored"""
+        search.fetch_url("https://example.com")
+        path = RequestSearch._cache_path("GET", "https://example.com")
+        expired = time.time() - searchutils.HTTP_CACHE_TTL - 1
+        os.utime(path, (expired, expired))
+        search.fetch_url("https://example.com")
+        assert session.request.call_count == 2
+
+    def test_captcha_is_discarded(self, session, search, tmp_path):
+        """Test a CAPTCHA page is raised and not served again from the cache"""
+        session.request.return_value = _response(b'<script src="recaptcha/api.js"></script>')
+        with pytest.raises(RequestSearch.CaptchaError):
+            search.fetch_url("https://example.com")
+        assert not os.listdir(tmp_path)
+
+    def test_captcha_with_headers_is_discarded(self, session, search, tmp_path):
+        """Test the discarded entry is the one keyed with the request headers"""
+        session.request.return_value = _response(b'<script src="recaptcha/api.js"></script>')
+        with pytest.raises(RequestSearch.CaptchaError):
+            search.fetch_url("https://example.com", headers={"Accept": "text/html"})
+        assert not os.listdir(tmp_path)
+
+    def test_error_status_is_not_cached(self, session, search, tmp_path):
+        """Test error pages are not stored and flag the fetch as failed"""
+        session.request.return_value = _response(b"Service Unavailable", ok=False)
+        search.fetch_url("https://example.com")
+        assert search.fetch_failed
+        assert not os.listdir(tmp_path)
+
+    def test_headers_are_part_of_the_key(self, session, search):
+        """Test requests differing only in headers get their own entries"""
+        search.fetch_url("https://example.com", headers={"Accept": "application/json"})
+        search.fetch_url("https://example.com", headers={"Accept": "text/html"})
+        search.fetch_url("https://example.com", headers={"accept": "text/html"})
+        assert session.request.call_count == 2
+
+    def test_post_data_is_part_of_the_key(self, session, search):
+        """Test POSTs with different data get their own entries"""
+        search.post_url("https://example.com", {"name": "DOE"})
+        search.post_url("https://example.com", {"name": "ROE"})
+        search.post_url("https://example.com", {"name": "DOE"})
+        assert session.request.call_count == 2
+
+    def test_store_replaces_atomically(self, session, search, monkeypatch, tmp_path):
+        """Test entries are written to a temporary file and moved into place"""
+        replace = Mock(wraps=os.replace)
+        monkeypatch.setattr(searchutils.os, "replace", replace)
+        search.fetch_url("https://example.com")
+        path = RequestSearch._cache_path("GET", "https://example.com")
+        replace.assert_called_once()
+        assert replace.call_args.args[1] == path
+        assert os.listdir(tmp_path) == [os.path.basename(path)]
+        with open(path, "rb") as file:
+            assert file.read() == b"utf-8\n<p>ok</p>"
+
+
+class TestShutdownWorkers:
+    """Test StealthSearch.shutdown_workers"""
+
+    def test_every_worker_shuts_down_once(self, monkeypatch):
+        """Test each executor thread closes its own browsers exactly once"""
+        threads = []
+        monkeypatch.setattr(StealthSearch, "shutdown", classmethod(lambda cls: threads.append(threading.get_ident())))
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            list(executor.map(time.sleep, [0.01] * 6))  # Start the workers
+            StealthSearch.shutdown_workers(executor, 3, timeout=5)
+        assert len(threads) == 3
+        assert len(set(threads)) == 3
+
+    def test_shut_down_executor_is_skipped(self, monkeypatch):
+        """Test an executor that already stopped its threads is left alone"""
+        shutdown = Mock()
+        monkeypatch.setattr(StealthSearch, "shutdown", shutdown)
+        executor = ThreadPoolExecutor(max_workers=2)
+        executor.shutdown()
+        StealthSearch.shutdown_workers(executor, 2, timeout=1)
+        shutdown.assert_not_called()
+
+
+class TestFetchUrls:
+    """Test StealthSearch.fetch_urls on a mocked context"""
+
+    @pytest.fixture
+    def pages(self, monkeypatch):
+        calls = []
+        pages = []
+
+        def new_page():
+            page = Mock()
+            def goto(url, **kwargs):
+                if "down" in url:
+                    raise Exception("Connection refused")
+                calls.append(("goto", url))
+
+            page.goto.side_effect = goto
+            page.wait_for_load_state.side_effect = lambda: calls.append(("load", ""))
+            page.content.side_effect = lambda: f"<p>{len(calls)}</p>"
+            pages.append(page)
+            return page
+
+        context = Mock()
+        context.new_page.side_effect = new_page
+        monkeypatch.setattr(StealthSearch, "_acquire", lambda self: (context, context.new_page()))
+        monkeypatch.setattr(StealthSearch, "_release", lambda self, context: None)
+        return pages, calls
+
+    def test_navigations_start_before_waiting(self, pages):
+        """Test every page starts loading before the first one is waited for"""
+        pages, calls = pages
+        result = StealthSearch().fetch_urls(["https://a.example", "https://b.example", "https://c.example"])
+        assert [name for name, _ in calls] == ["goto"] * 3 + ["load"] * 3
+        assert [url for name, url in calls if name == "goto"] == [
+            "https://a.example", "https://b.example", "https://c.example"
+        ]
+        assert len(pages) == 3
+        assert len(result) == 3 and all(result)
+
+    def test_failed_page_is_none(self, pages):
+        """Test a page that fails to load is None and flags the fetch, the others are kept"""
+        search = StealthSearch()
+        result = search.fetch_urls(["https://a.example", "https://down.example"])
+        assert result[0] and result[1] is None
+        assert search.fetch_failed
+
+    def test_captcha_is_raised(self, pages):
+        """Test a CAPTCHA on any page raises"""
+        pages, _ = pages
+        search = StealthSearch()
+        search._check_for_captcha = lambda content: True
+        with pytest.raises(StealthSearch.CaptchaError):
+            search.fetch_urls(["https://a.example", "https://b.example"])